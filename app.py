@@ -1,60 +1,138 @@
+import time
+
+STARTUP_STARTED = time.perf_counter()
+
 from os import path
 import sys
 import configparser
 import sqlite3
-from PyQt5.QtCore import Qt, QTimer, QFile, QTextStream
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
+    QAction,
     QApplication,
-    QHBoxLayout,
     QLabel,
     QMainWindow,
+    QMenu,
     QMessageBox,
     QInputDialog,
     QWidget,
     QVBoxLayout,
-    QGridLayout,
     QPushButton,
     QLineEdit,
-    QSizePolicy,
     QDialog,
     QDialogButtonBox,
     QFileDialog,
+    QProgressDialog,
 )
-import logging
 
-# import BreezeStyleSheets
-import pkg_resources
 from main_view_ui import Ui_MainWindow
-from flowlayout import FlowLayout
+from taskview import TaskGrid
+import journal
+import logsetup
+import model
+import perf
+import repository
+import resources
+import snapshot
+import storage
 from datetime import datetime, timedelta
 
+db_log = logsetup.get_logger("db")
+ui_log = logsetup.get_logger("ui")
+timer_log = logsetup.get_logger("timer")
+
+TICK_INTERVAL = 1000
+WRITER_CLOSE_TIMEOUT = 10
+JOURNAL_HEARTBEAT = 15
+MATERIALIZED_TABS = 8
+ARCHIVED_TAB = "{} (archiviert)"
+MAX_RECENT = 8
+
+
+class StartupTimer:
+    """Collects the duration of each startup phase for --startup-timing."""
+
+    def __init__(self, started=STARTUP_STARTED):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, file=sys.stderr):
+        for phase, seconds in self.phases:
+            print("{:<12} {:8.1f} ms".format(phase, seconds * 1000), file=file)
+        total = (self.last - self.started) * 1000
+        print("{:<12} {:8.1f} ms".format("total", total), file=file)
+
+
+class StateLoader(QThread):
+    """Runs storage.load_state off the GUI thread with its own connection."""
+
+    done = pyqtSignal(object)
+
+    def __init__(self, database_file, config, archived=False, parent=None):
+        super().__init__(parent)
+        self.database_file = database_file
+        self.config = config
+        self.archived = archived
+
+    def run(self):
+        db = storage.connect_read_only(self.database_file)
+        try:
+            state = storage.load_state(db, self.config)
+            if self.archived:
+                state.update(storage.load_state(db, self.config, True))
+            self.done.emit(state)
+        finally:
+            db.close()
+
 
 class Window(QMainWindow, Ui_MainWindow):
-    def __init__(self, parent=None):
+    # Carries (callback, future) of a queued write back to the GUI thread.
+    write_done = pyqtSignal(object, object)
+
+    def __init__(self, parent=None, startup=None, config_file=None):
         super().__init__(parent)
+        startup = startup or StartupTimer()
         self.setupUi(self)
-
-        style_sheet = pkg_resources.resource_filename(
-            __name__, "BreezeStyleSheets/dark.qss"
-        )
-        style_sheet = pkg_resources.resource_filename(__name__, "dark.qss")
-        # with open('BreezeStyleSheets/dark.qss') as fili: style_sheet = fili.read()
-        file = QFile(style_sheet)
-        file.open(QFile.ReadOnly | QFile.Text)
-        stream = QTextStream(file)
-        self.setStyleSheet(stream.readAll())
-        self.project_format = "Flex_Grid"
-        self.project_dict = {}
+        startup.mark("widgets")
+
+        self.setStyleSheet(resources.load_stylesheet())
+        startup.mark("stylesheet")
+        self.model = model.Model()
+        # Widgets are kept apart from the model: tabs by project name and
+        # task widgets by task id, the latter only while they are drawn.
+        self.tabs = {}
+        self.task_widgets = {}
         self.database_file = None
-
-        self.config_file = pkg_resources.resource_filename(
-            __name__, "time-tracker.config"
-        )
+        self.session = None
+        self.writer = None
+        self.journal = None
+        self.last_beat = 0
+        self.changes = storage.ChangeTracker()
+        self.running_tasks = {}
+        self.materialized_tabs = []
+        self.perf_dialog = None
+        self.state_loader = None
+        # Futures of the inserts of projects and tasks still without an id.
+        self.pending_ids = {}
+        self.write_done.connect(lambda callback, future: callback(future))
+        self.ticker = QTimer(self)
+        self.ticker.timeout.connect(lambda: self.tick(by_ui_interaction=False))
+
+        self.config_file = config_file or resources.resource_path("time-tracker.config")
         self.config = configparser.ConfigParser()
         with open(self.config_file, "r") as conf:
             self.config.read_file(conf)
+        self.repository = repository.Repository(self.config)
 
         self.setup_logging()
+        perf.enable(self.config.getboolean("state", "perf", fallback=False))
+        startup.mark("config")
 
         if self.config.has_section("state"):  # and 'file' in self.config['state']:
             if not "file" in self.config["state"] or not path.exists(
@@ -62,8 +140,13 @@ class Window(QMainWindow, Ui_MainWindow):
             ):
                 self.open_file_dialog(True)
 
-            self.database_file = self.config["state"].get("file")
-            self.populate_from_db()
+            if (
+                self.session is None
+                and "file" in self.config["state"]
+                and path.exists(self.config["state"]["file"])
+            ):
+                self.open_database(self.config["state"]["file"])
+            startup.mark("db load")
 
             if "auto_save" in self.config["state"]:
                 save_interval = int(self.config["state"].get("auto_save"))
@@ -79,7 +162,7 @@ class Window(QMainWindow, Ui_MainWindow):
 
     def setup_logging(self, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Setting up a log-file because of manual trigger.")
+            ui_log.debug("Setting up a log-file because of manual trigger.")
         if self.config.has_section("state") and not "LOG_TO" in self.config["state"]:
             log_file, check = QFileDialog.getSaveFileName(
                 None, "Speicherort für Log-Dateien auswählen", "", "Logfile (*.log)"
@@ -88,19 +171,15 @@ class Window(QMainWindow, Ui_MainWindow):
                 self.config["state"]["LOG_TO"] = log_file
 
         if "LOG_TO" in self.config["state"]:
-            logging.basicConfig(
-                format="%(asctime)s %(message)s",
-                filename=self.config["state"]["LOG_TO"],
-                level=logging.DEBUG,
-            )
+            logsetup.setup(self.config, self.config["state"]["LOG_TO"])
             with open(self.config_file, "w") as conf:
                 self.config.write(conf)
         else:
-            logging.basicConfig(format="%(asctime)s %(message)s", level=logging.DEBUG)
+            logsetup.setup(self.config)
 
     def open_file_dialog(self, new_file=False, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Open_File dialog for database because of manual trigger.")
+            ui_log.debug("Open_File dialog for database because of manual trigger.")
         if new_file:
             file, check = QFileDialog.getSaveFileName(
                 None,
@@ -109,18 +188,12 @@ class Window(QMainWindow, Ui_MainWindow):
                 "Datenbank (*.db);;Alle Dateitypen (*)",
             )
             if check:
-                self.database_file = file
-                db = sqlite3.connect(self.database_file)
-                try:
-                    for table in self.config["TABLES"]:
-                        table_statement = self.config["TABLES"][table]
-                        db.execute(table_statement)
-                        logging.debug(table_statement)
-                        self.statusBar().showMessage("Datenbank wurde angelegt.")
-                except Exception:
+                self.write_state()
+                created = self.open_database(file, new_file=True)
+                if created:
+                    self.statusBar().showMessage("Datenbank wurde angelegt.")
+                elif created is not None:
                     self.statusBar().showMessage("Datenbank nicht leer, lade Inhalte.")
-                db.commit()
-                db.close()
         else:
             file, check = QFileDialog.getOpenFileName(
                 None,
@@ -129,187 +202,338 @@ class Window(QMainWindow, Ui_MainWindow):
                 "Datenbank (*.db);;Alle Dateitypen (*)",
             )
             if check:
-                self.database_file = file
+                self.write_state()
+                self.open_database(file)
 
         if check:
-            self.populate_from_db()
-            self.config["state"]["file"] = self.database_file
-            with open(self.config_file, "w") as conf:
-                self.config.write(conf)
             return file
         else:
             self.statusBar().showMessage("Es wurde keine Datenbank angelegt.")
 
-    def clean_canvas(self, by_ui_interaction=False):
+    def open_database(self, database_file, new_file=False, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Clearing UI Canvas because of manual trigger.")
-        for project in self.project_dict:
-            for task in self.project_dict[project]["tasks"]:
-                self.delete_task(
-                    self.project_dict[project]["tasks"][task]["task_obj"],
-                    permanent=False,
+            db_log.debug(
+                "Opening database %s because of manual trigger.", database_file
+            )
+        # Checked before the session opens, which already touches the files.
+        cached = None if new_file else snapshot.load(database_file)
+        created = self.open_session(database_file, new_file=new_file)
+        if created is None:
+            return None
+        if cached is None:
+            self.populate_from_db()
+        else:
+            db_log.debug("Drawing %s from its snapshot.", database_file)
+            expected = snapshot.rows(cached)
+            self.populate_from_db(cached)
+            self.reconcile(expected)
+        self.resume_timers()
+
+        self.config["state"]["file"] = database_file
+        recent = [file for file in self.recent_files() if file != database_file]
+        self.config["state"]["recent"] = "\n".join(
+            [database_file] + recent[: MAX_RECENT - 1]
+        )
+        with open(self.config_file, "w") as conf:
+            self.config.write(conf)
+        return created
+
+    def recent_files(self, by_ui_interaction=False):
+        return [
+            file for file in self.config["state"].get("recent", "").splitlines() if file
+        ]
+
+    def open_recent(self, database_file, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Opening recent database because of manual trigger.")
+        if not path.exists(database_file):
+            self.statusBar().showMessage(
+                "{} existiert nicht mehr.".format(database_file)
+            )
+            recent = [file for file in self.recent_files() if file != database_file]
+            self.config["state"]["recent"] = "\n".join(recent)
+            with open(self.config_file, "w") as conf:
+                self.config.write(conf)
+            return
+        if database_file == self.database_file:
+            return
+        self.write_state()
+        self.open_database(database_file)
+
+    def fill_recent_menu(self, by_ui_interaction=False):
+        self.recent_menu.clear()
+        for file in self.recent_files():
+            action = self.recent_menu.addAction(file)
+            action.triggered.connect(
+                lambda checked, file=file: self.open_recent(
+                    file, by_ui_interaction=True
                 )
-            self.project_dict[project]["tab"].setParent(None)
-            self.project_dict[project]["tab"].deleteLater()
-        self.project_dict = {}
+            )
+        if self.recent_menu.isEmpty():
+            self.recent_menu.addAction("Keine Einträge").setEnabled(False)
 
-    def populate_from_db(self, by_ui_interaction=False):
+    def reconcile(self, expected, by_ui_interaction=False):
+        """Load the database in the background and compare it to the snapshot."""
+        loader = StateLoader(
+            self.database_file, self.config, self.action_open_archived.isChecked(), self
+        )
+        loader.done.connect(
+            lambda state: self.reconciled(loader.database_file, expected, state)
+        )
+        loader.finished.connect(loader.deleteLater)
+        self.state_loader = loader
+        loader.start()
+
+    def reconciled(self, database_file, expected, state, by_ui_interaction=False):
+        self.state_loader = None
+        if database_file != self.database_file:
+            return
+        if snapshot.same(expected, snapshot.rows(state)):
+            db_log.debug("Snapshot of %s is current.", database_file)
+            return
+        db_log.debug(
+            "Snapshot of %s is outdated, applying the loaded state.", database_file
+        )
+        self.apply_state(state)
+
+    def open_session(self, database_file, new_file=False, by_ui_interaction=False):
+        """Open database_file, returning whether its tables were created.
+
+        Returns None if it cannot be opened, e.g. because it is no time-tracker
+        database. That is found out before the current session is closed,
+        which then simply stays open with its timers running.
+        """
         if by_ui_interaction:
-            logging.debug(
+            db_log.debug("Opening database session because of manual trigger.")
+        session = None
+        try:
+            session = storage.Session(database_file)
+            created = new_file and storage.create_tables(session.db, self.config)
+            storage.migrate(session.db)
+        except sqlite3.Error as e:
+            db_log.warning("Could not open %s: %s", database_file, e)
+            if session is not None:
+                session.close()
+            self.statusBar().showMessage(
+                "{} konnte nicht geöffnet werden: {}".format(database_file, e)
+            )
+            return None
+        self.close_session()
+        self.start_session(database_file, session)
+        return created
+
+    def start_session(self, database_file, session, by_ui_interaction=False):
+        self.database_file = database_file
+        self.session = session
+        events_file = journal.journal_file(database_file)
+        if journal.replay(self.session.db, self.repository, events_file):
+            self.statusBar().showMessage(
+                "Nicht gespeicherte Zeiten wurden wiederhergestellt."
+            )
+        self.journal = journal.Journal(
+            events_file, storage.journal_seq(self.session.db)
+        )
+        self.writer = storage.Writer(database_file)
+
+    def close_session(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            db_log.debug("Closing database session because of manual trigger.")
+        if self.state_loader is not None:
+            self.state_loader.wait()
+        for task in list(self.running_tasks.values()):
+            self.stop_stopwatch(task)
+        self.write_state()
+        if self.writer is not None:
+            self.writer.close(WRITER_CLOSE_TIMEOUT)
+            self.writer = None
+            # Their queued callbacks would only arrive after the snapshot.
+            for item, future in list(self.pending_ids.items()):
+                if future.done():
+                    self.registered(item, future)
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+            # Only now are all connections closed and the WAL file merged.
+            snapshot.save(self.database_file, self.model)
+
+    @perf.timed("ui.clean_canvas")
+    def clean_canvas(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Clearing UI Canvas because of manual trigger.")
+        for task in list(self.running_tasks.values()):
+            self.delete_task(task, permanent=False)
+        self.ProjektVerzeichnis.blockSignals(True)
+        for tab in self.tabs.values():
+            tab.setParent(None)
+            tab.deleteLater()
+        self.ProjektVerzeichnis.blockSignals(False)
+        self.model = model.Model()
+        self.tabs = {}
+        self.task_widgets = {}
+        self.changes.clear()
+        self.running_tasks = {}
+        self.materialized_tabs = []
+
+    @perf.timed("ui.populate_from_db")
+    def populate_from_db(self, state=None, by_ui_interaction=False):
+        if by_ui_interaction:
+            db_log.debug(
                 "Started populating UI Canvas from database file because of manual trigger."
             )
-        self.clean_canvas()
-        if self.database_file:
-            logging.debug("Attempting to load State from {}".format(self.database_file))
-            projects_scheme = self.config["SCHEMES"].get("projects_scheme").split(", ")
-            tasks_scheme = self.config["SCHEMES"].get("tasks_scheme").split(", ")
-            with sqlite3.connect(self.database_file) as db:
-                conn = db.cursor()
-                try:
-                    logging.debug("Loading Projects...")
-                    conn.execute(
-                        "SELECT {keys} FROM projects;".format(
-                            keys=", ".join(projects_scheme)
-                        )
-                    )
-                    projects_tuple = conn.fetchall()
-                    for project in projects_tuple:
-                        self.project_dict[project[1]] = {
-                            "id": project[0],
-                            "name": project[1],
-                            "started_at": project[2],
-                            "ended_at": project[3],
-                            "tasks": {},
-                            "tab": None,
-                        }
-                    logging.debug("Projects loaded.")
-                except Exception as e:
-                    logging.debug(e)
-                try:
-                    logging.debug("Loading tasks...")
-                    for project in self.project_dict:
-                        conn.execute(
-                            "SELECT {keys} FROM tasks WHERE project_id = {pid};".format(
-                                keys=", ".join(tasks_scheme),
-                                pid=self.project_dict[project]["id"],
-                            )
-                        )
-                        tasks_tuple = conn.fetchall()
-                        logging.debug(tasks_tuple)
-                        for task in tasks_tuple:
-                            self.project_dict[project]["tasks"][task[2]] = {
-                                "id": task[0],
-                                "project_id": task[1],
-                                "name": task[2],
-                                "started_at": task[3],
-                                "ended_at": task[4],
-                                "time_slots": [],
-                                "task_obj": None,
-                                "count": task[5],
-                            }
-                            logging.debug("Loaded Task {}".format(task[2]))
-                            sql = "SELECT SUM(count) FROM timestamps WHERE task_id = {};".format(
-                                task[0]
-                            )
-                            conn.execute(sql)
-                            cnt = conn.fetchone()[0]
-                            if cnt:
-                                self.project_dict[project]["tasks"][task[2]][
-                                    "count"
-                                ] = int(cnt)
-                            else:
-                                self.project_dict[project]["tasks"][task[2]][
-                                    "count"
-                                ] = 0
-                    logging.debug("All tasks loaded.")
-
-                except Exception as e:
-                    logging.debug(e)
-            logging.debug("State fully loaded!")
-            logging.debug("Project-Dict: {}".format(self.project_dict))
-            self.draw_state()
-
-    def draw_state(self, by_ui_interaction=False):
+        if self.session is None:
+            self.clean_canvas()
+            return
+        if state is None:
+            db_log.debug("Attempting to load State from %s", self.database_file)
+            state = storage.load_state(self.session.db, self.config)
+        if self.action_open_archived.isChecked():
+            state.update(storage.load_state(self.session.db, self.config, True))
+        db_log.debug("State fully loaded!")
+        db_log.debug("Loaded %s projects.", len(state))
+        self.apply_state(state)
+
+    @perf.timed("ui.apply_state")
+    def apply_state(self, state, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug(
+                "Applying loaded state to UI Canvas because of manual trigger."
+            )
+        self.carry_over(state)
+        added, removed, kept = storage.diff_states(self.model, state)
+        ui_log.debug(
+            "Reload adds %s projects, removes %s and keeps %s.",
+            len(added),
+            len(removed),
+            len(kept),
+        )
+        self.ProjektVerzeichnis.blockSignals(True)
+        for project in removed:
+            self.drop_tab(project)
+        self.ProjektVerzeichnis.blockSignals(False)
+
+        self.model = state
+        for project in kept:
+            if self.tabs[project].tasks_drawn:
+                self.tabs[project].grid.reload()
+        self.draw_state(added)
+
+        index = self.ProjektVerzeichnis.currentIndex()
+        if index >= 0:
+            self.show_tab(index)
+
+    def carry_over(self, state, by_ui_interaction=False):
+        """Move running timers and unsaved time from the model to state.
+
+        Tasks are matched by id. A timer whose task is gone from state is
+        stopped, and time slots of such tasks are dropped.
+        """
+        for task in list(self.running_tasks.values()):
+            loaded = state.tasks_by_id.get(task.id)
+            if loaded is None:
+                self.stop_stopwatch(task)
+                continue
+            loaded.running_since = task.running_since
+            loaded.timer_started_at = task.timer_started_at
+            self.running_tasks[task.id] = loaded
+        for task, first in list(self.changes.time_slots.items()):
+            loaded = state.tasks_by_id.get(task.id)
+            if loaded is None:
+                self.changes.discard_task(task)
+            elif loaded is not task:
+                # Still waiting for write_state, so missing from state.
+                pending = sum(task.time_slots.count[first:])
+                loaded.count += pending
+                loaded.project.count += pending
+
+    def drop_tab(self, project_name, by_ui_interaction=False):
+        tab = self.tabs.pop(project_name)
+        if tab.vLayout is not None:
+            tab.grid.release()
+        self.ProjektVerzeichnis.removeTab(self.ProjektVerzeichnis.indexOf(tab))
+        tab.deleteLater()
+        if project_name in self.materialized_tabs:
+            self.materialized_tabs.remove(project_name)
+
+    @perf.timed("ui.draw_state")
+    def draw_state(self, projects=None, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Drawing fresh state on UI Canvas because of manual trigger.")
-        for project in self.project_dict:
-            logging.debug("Drawing {}".format(project))
+            ui_log.debug("Drawing fresh state on UI Canvas because of manual trigger.")
+        if projects is None:
+            projects = list(self.model)
+        for project in projects:
+            ui_log.debug("Drawing %s", project)
             self.new_project(project)
 
-            for task in self.project_dict[project]["tasks"]:
-                logging.debug("Drawing {}".format(task))
-                self.new_task(project, task)
-
+    @perf.timed("db.write_state")
     def write_state(self, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
+            db_log.debug(
                 "Writing current state of UI Canvas to database because of manual trigger."
             )
-        logging.debug("Saving current state...")
-        projects_scheme = self.config["SCHEMES"].get("projects_scheme").split(", ")
-        tasks_scheme = self.config["SCHEMES"].get("tasks_scheme").split(", ")
-        to_db = {"projects": [], "tasks": [], "timestamps": []}
-
-        logging.debug("Compiling serializeable state.")
-        for project in self.project_dict:
-            logging.debug("Iterating projects...")
-            temp_proj = {}
-            for key in projects_scheme:
-                if key in self.project_dict[project]:
-                    temp_proj[key] = self.project_dict[project][key]
-                else:
-                    temp_proj[key] = ""
-            to_db["projects"].append(temp_proj)
-
-            logging.debug("Iterating Tasks for project {}...".format(project))
-            for task in self.project_dict[project]["tasks"]:
-                self.save_timer(
-                    task=self.project_dict[project]["tasks"][task]["task_obj"],
-                    project_name=project,
-                    auto_save=True,
-                )
-                for timestamp in self.project_dict[project]["tasks"][task][
-                    "time_slots"
-                ]:
-                    to_db["timestamps"].append(timestamp)
-
-                temp_task = {}
-                for key in tasks_scheme:
-                    if key in self.project_dict[project]["tasks"][task]:
-                        temp_task[key] = self.project_dict[project]["tasks"][task][key]
-                    else:
-                        temp_task[key] = ""
-                to_db["tasks"].append(temp_task)
-
-        if not self.database_file:
-            return
-        with sqlite3.connect(self.database_file) as db:
-            cursor = db.cursor()
-            for item in to_db["projects"]:
-                sql_insert = "REPLACE INTO {} ({}) VALUES('{}');".format(
-                    "projects",
-                    ", ".join([key for key in item]),
-                    "', '".join([str(item[key]) for key in item]),
-                )
-                cursor.execute(sql_insert)
-            for item in to_db["tasks"]:
-                sql_insert = "REPLACE INTO {} ({}) VALUES('{}');".format(
-                    "tasks",
-                    ", ".join([key for key in item]),
-                    "', '".join([str(item[key]) for key in item]),
-                )
-                cursor.execute(sql_insert)
-            for item in to_db["timestamps"]:
-                sql_insert = "INSERT INTO {} ({}) VALUES('{}');".format(
-                    "timestamps",
-                    ", ".join([key for key in item]),
-                    "', '".join([str(item[key]) for key in item]),
-                )
-                cursor.execute(sql_insert)
+        db_log.debug("Saving current state...")
+        for task in list(self.running_tasks.values()):
+            self.save_timer(task, auto_save=True)
+        self.submit_changes()
+
+    def submit_changes(self, by_ui_interaction=False):
+        if self.writer is None or not self.changes:
+            return
+        batch = self.changes.take()
+        events = self.journal
+        batch["journal_seq"] = seq = events.seq
+        future = self.writer.submit(storage.write_batch, self.repository, batch)
+        future.add_done_callback(
+            lambda future: self.compact_journal(events, seq, future)
+        )
+        session = self.session
+        self.when_written(future, lambda future: self.batch_written(session, future))
+
+    def batch_written(self, session, future, by_ui_interaction=False):
+        """Follow the timers that cli.py started or stopped meanwhile."""
+        if session is not self.session or future.exception() is not None:
+            return
+        result = future.result()
+        for task_id, (started_at, running_since) in result["claimed"].items():
+            task = self.model.tasks_by_id.get(task_id)
+            if task is not None and task.timer_started_at == started_at:
+                timer_log.debug("Task %s was already started elsewhere.", task.name)
+                self.resume_stopwatch(task, running_since)
+        for task_id, count in result["dropped"]:
+            task = self.model.tasks_by_id.get(task_id)
+            if task is None:
+                continue
+            task.count -= count
+            task.project.count -= count
+            if task.running:
+                timer_log.debug("Task %s was stopped elsewhere.", task.name)
+                self.journal.stop(task.id, datetime.now())
+                task.running_since = None
+                task.timer_started_at = None
+                self.running_tasks.pop(task.id, None)
+            self.showTime(task)
+        if result["dropped"]:
+            self.refresh_tab()
+
+    def resume_timers(self, by_ui_interaction=False):
+        """Run the timers persisted in the database, e.g. by cli.py start."""
+        for task_id, _, _, started_at in storage.load_running_timers(self.session.db):
+            task = self.model.tasks_by_id.get(task_id)
+            if task is not None and not task.running:
+                self.resume_stopwatch(task, storage.as_datetime(started_at))
+
+    def compact_journal(self, events, seq, future, by_ui_interaction=False):
+        # Runs on the writer thread once the batch covering seq is done. The
+        # journal of the batch is passed in, as a writer that outlived
+        # close_session may finish after another database was opened.
+        if future.exception() is None:
+            events.compact(seq)
 
     def connectSignalsSlots(self, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Connecting Signalslots because of manual trigger.")
+            ui_log.debug("Connecting Signalslots because of manual trigger.")
         self.action_about.triggered.connect(lambda: self.about(by_ui_interaction=True))
         self.action_new_projekt.triggered.connect(
             lambda: self.new_project(by_ui_interaction=True)
@@ -320,23 +544,322 @@ class Window(QMainWindow, Ui_MainWindow):
         self.action_new.triggered.connect(
             lambda: self.open_file_dialog(True, by_ui_interaction=True)
         )
+        self.action_export.triggered.connect(
+            lambda: self.export_data(by_ui_interaction=True)
+        )
+        self.action_report = QAction("Bericht", self)
+        self.menu_projects.addAction(self.action_report)
+        self.action_report.triggered.connect(
+            lambda: self.show_report(by_ui_interaction=True)
+        )
+        self.action_archive_project.triggered.connect(
+            lambda: self.archive_project(by_ui_interaction=True)
+        )
+        self.menu_projects.addAction(self.action_open_archived)
+        self.recent_menu = QMenu(self)
+        self.recent_menu.aboutToShow.connect(self.fill_recent_menu)
+        self.action_open_recent.setMenu(self.recent_menu)
+        actions = self.menu_files.actions()
+        self.menu_files.insertAction(
+            actions[actions.index(self.action_open_file) + 1], self.action_open_recent
+        )
+        self.action_search_file.setText("Suchen...")
+        self.action_search_file.setShortcut("Ctrl+F")
+        self.menu_projects.addAction(self.action_search_file)
+        self.action_search_file.triggered.connect(
+            lambda: self.search(by_ui_interaction=True)
+        )
+        self.action_open_archived.toggled.connect(
+            lambda checked: self.show_archived(checked, by_ui_interaction=True)
+        )
+        self.action_rebuild_rollup = QAction("Tagessummen neu berechnen", self)
+        self.menu_files.addAction(self.action_rebuild_rollup)
+        self.action_rebuild_rollup.triggered.connect(
+            lambda: self.rebuild_rollup(by_ui_interaction=True)
+        )
+        self.action_perf_stats = QAction("Performance-Statistik", self)
+        self.menu_help.addAction(self.action_perf_stats)
+        self.action_perf_stats.triggered.connect(
+            lambda: self.show_perf_stats(by_ui_interaction=True)
+        )
+        self.ProjektVerzeichnis.currentChanged.connect(
+            lambda index: self.show_tab(index, by_ui_interaction=False)
+        )
+
+    def archive_project(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            db_log.debug("Archiving current Project because of manual trigger.")
+        if self.session is None:
+            self.statusBar().showMessage("Aktuell ist keine Datenbank geöffnet.")
+            return
+        tab = self.ProjektVerzeichnis.currentWidget()
+        if tab is None:
+            self.statusBar().showMessage("Es ist kein Projekt ausgewählt.")
+            return
+        project = self.model[tab.project_name]
+        if project.ended_at is not None:
+            self.statusBar().showMessage("Das Projekt ist bereits archiviert.")
+            return
+        if project.id is None:
+            self.statusBar().showMessage("{} wird noch angelegt.".format(project.name))
+            return
+        answer = QMessageBox.question(
+            self,
+            "Projekt archivieren",
+            "Soll {} archiviert werden?\nDie Zeiten werden in die Archiv-Datenbank "
+            "verschoben.".format(project.name),
+        )
+        if answer != QMessageBox.Yes:
+            return
+        for task in project.tasks.values():
+            self.stop_stopwatch(task)
+        self.write_state()
+        # Read-only from now on, so nothing new goes into the hot database.
+        project.ended_at = datetime.now()
+        self.update_read_only(tab)
+        future = self.writer.submit(
+            storage.archive_project, self.database_file, project.id, project.ended_at
+        )
+        session = self.session
+        self.when_written(
+            future, lambda future: self.project_archived(session, project.name, future)
+        )
+        self.statusBar().showMessage("{} wird archiviert...".format(project.name))
+
+    def project_archived(self, session, project_name, future, by_ui_interaction=False):
+        if session is not self.session or project_name not in self.model:
+            return
+        project = self.model[project_name]
+        tab = self.tabs.get(project_name)
+        if future.exception() is not None:
+            project.ended_at = None
+            if tab is not None:
+                self.update_read_only(tab)
+            self.statusBar().showMessage(
+                "{} konnte nicht archiviert werden: {}".format(
+                    project_name, future.exception()
+                )
+            )
+            return
+        if self.action_open_archived.isChecked():
+            if tab is not None:
+                self.ProjektVerzeichnis.setTabText(
+                    self.ProjektVerzeichnis.indexOf(tab),
+                    ARCHIVED_TAB.format(project_name),
+                )
+        else:
+            if tab is not None:
+                self.drop_tab(project_name)
+            self.model.remove_project(project)
+        self.statusBar().showMessage("{} wurde archiviert.".format(project_name))
+
+    def update_read_only(self, tab, by_ui_interaction=False):
+        """Enable editing the tasks of tab only while its project is open."""
+        if tab.vLayout is None:
+            # build_tab takes care of it.
+            return
+        tab.add_task_button.setEnabled(self.model[tab.project_name].ended_at is None)
+        if tab.tasks_drawn:
+            tab.grid.reload()
+
+    def show_archived(self, checked, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug(
+                "%s archived Projects because of manual trigger.",
+                "Showing" if checked else "Hiding",
+            )
+        if self.session is None:
+            return
+        if checked:
+            # Loaded only now, so they cost nothing while they stay hidden.
+            archived = storage.load_state(self.session.db, self.config, True)
+            self.model.update(archived)
+            self.draw_state(list(archived))
+            return
+        for project in list(self.model.projects.values()):
+            if project.ended_at is not None:
+                for task in project.tasks.values():
+                    self.stop_stopwatch(task)
+                self.drop_tab(project.name)
+                self.model.remove_project(project)
+
+    def search(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Searching projects and tasks because of manual trigger.")
+        if self.session is None:
+            self.statusBar().showMessage("Aktuell ist keine Datenbank geöffnet.")
+            return
+        from searchdialog import SearchDialog
+
+        dlg = SearchDialog(self.session.db, self)
+        # Names registered a moment ago may still wait for the writer.
+        self.when_written(self.writer.drained(), lambda future: dlg.refresh())
+        if dlg.exec() and dlg.selected() is not None:
+            self.jump_to(*dlg.selected())
+
+    def jump_to(self, project_name, task_name=None, by_ui_interaction=False):
+        if project_name not in self.model and not self.action_open_archived.isChecked():
+            # Archived projects are only loaded on demand.
+            self.action_open_archived.setChecked(True)
+        tab = self.tabs.get(project_name)
+        if tab is None:
+            return
+        self.ProjektVerzeichnis.setCurrentWidget(tab)
+        if task_name is not None:
+            # The grid only knows its viewport size once the tab is laid out.
+            QTimer.singleShot(0, lambda: self.show_task(tab, task_name))
+
+    def show_task(self, tab, task_name, by_ui_interaction=False):
+        if tab.vLayout is None:
+            return
+        widget = tab.grid.scroll_to(task_name)
+        if widget is not None:
+            widget.highlight()
+
+    def rebuild_rollup(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            db_log.debug("Rebuilding daily totals because of manual trigger.")
+        if self.session is None:
+            self.statusBar().showMessage("Aktuell ist keine Datenbank geöffnet.")
+            return
+        self.write_state()
+        # An explicit maintenance action, so it may wait for the writer.
+        rows = self.writer.submit(storage.rebuild_rollup, self.database_file).result()
+        self.statusBar().showMessage(
+            "Tagessummen neu berechnet ({} Einträge).".format(rows)
+        )
+
+    def export_data(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Exporting timestamps because of manual trigger.")
+        if self.session is None:
+            self.statusBar().showMessage("Aktuell ist keine Datenbank geöffnet.")
+            return
+        from exportdialog import ExportDialog
+
+        dlg = ExportDialog(self.model.projects)
+        if not dlg.exec():
+            return
+        options = dlg.options()
+        if options["format"] == "csv":
+            file_filter = "CSV (*.csv);;Alle Dateitypen (*)"
+        else:
+            file_filter = "JSON Lines (*.jsonl);;Alle Dateitypen (*)"
+        file, check = QFileDialog.getSaveFileName(
+            None, "Export speichern", "", file_filter
+        )
+        if not check:
+            return
+        self.write_state()
+        session = self.session
+        self.when_written(
+            self.writer.drained(),
+            lambda future: self.start_export(session, file, options),
+        )
+
+    def start_export(self, session, file, options, by_ui_interaction=False):
+        # Called once the writer has caught up, so the export sees every slot.
+        if session is not self.session:
+            return
+        from exportdialog import ExportWorker
+
+        progress = QProgressDialog("Exportiere Zeiten...", "Abbrechen", 0, 0, self)
+        progress.setWindowModality(Qt.WindowModal)
+        worker = ExportWorker(self.database_file, file, options, self)
+        worker.progress.connect(
+            lambda written, total: self.export_progress(progress, written, total)
+        )
+        worker.done.connect(lambda written: self.export_done(progress, written))
+        worker.failed.connect(lambda error: self.export_done(progress, None, error))
+        progress.canceled.connect(worker.cancel)
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+        progress.show()
+
+    def show_report(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Building report because of manual trigger.")
+        if self.session is None:
+            self.statusBar().showMessage("Aktuell ist keine Datenbank geöffnet.")
+            return
+        from reportdialog import DateRangeDialog
+
+        dlg = DateRangeDialog()
+        if not dlg.exec():
+            return
+        first_day, last_day = dlg.selected_range()
+        self.write_state()
+        session = self.session
+        self.when_written(
+            self.writer.drained(),
+            lambda future: self.open_report(session, first_day, last_day),
+        )
+
+    def open_report(self, session, first_day, last_day, by_ui_interaction=False):
+        # Called once the writer has caught up, so the report sees every slot.
+        if session is not self.session:
+            return
+        from reportdialog import ReportDialog
+        import report
+
+        archived = self.action_open_archived.isChecked() and path.exists(
+            storage.archive_file(self.database_file)
+        )
+        if archived:
+            storage.attach_archive(self.session.db, self.database_file)
+        with perf.span("db.build_report"):
+            result = report.build_report(
+                self.session.db, first_day, last_day, archived=archived
+            )
+        ReportDialog(result, first_day, last_day).exec()
+
+    def show_perf_stats(self, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug("Showing performance statistics because of manual trigger.")
+        from perfdialog import PerfDialog
+
+        if self.perf_dialog is None:
+            self.perf_dialog = PerfDialog(self)
+        self.perf_dialog.show()
+        self.perf_dialog.raise_()
+
+    def export_progress(self, progress, written, total):
+        progress.setMaximum(total)
+        progress.setValue(written)
+
+    def export_done(self, progress, written, error=None):
+        progress.close()
+        if error:
+            ui_log.debug("Export failed: %s", error)
+            self.statusBar().showMessage("Export fehlgeschlagen: {}".format(error))
+        elif written is None:
+            self.statusBar().showMessage("Export abgebrochen.")
+        else:
+            self.statusBar().showMessage("{} Zeiten exportiert.".format(written))
 
     def closeEvent(self, event, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug("Executing CloseEvents because of manual trigger.")
-        logging.debug("Saving state...")
+            ui_log.debug("Executing CloseEvents because of manual trigger.")
+        ui_log.debug("Saving state...")
         self.write_state()
-        logging.debug("Finished!")
+        self.close_session()
+        ui_log.debug("Finished!")
+        logsetup.shutdown()
         self.close
 
-    def register_db_id(self, type: str, object_dict, by_ui_interaction=False):
+    def when_written(self, future, callback, by_ui_interaction=False):
+        """Call callback(future) on the GUI thread once the writer is done."""
+        future.add_done_callback(lambda future: self.write_done.emit(callback, future))
+
+    @perf.timed("db.register_db_id")
+    def register_db_id(self, type: str, item, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Registering new item in database because of manual trigger:\n  Type: {}\n  JSON: {}".format(
-                    type, object_dict
-                )
+            db_log.debug(
+                "Registering new item in database because of manual trigger:\n  Type: %s\n  JSON: %s",
+                type,
+                item,
             )
-        if not path.isfile(self.database_file):
+        if self.session is None:
             dlg = GeneralDialog(
                 info_txt="Aktuell ist keine Datenbank geöffnet.\nBitte öffne erst eine Datenbank oder lege eine neue Datei an.",
                 info=True,
@@ -344,146 +867,234 @@ class Window(QMainWindow, Ui_MainWindow):
             )
             if dlg.exec():
                 return
-        if type == "project":
-            type = "projects"
-            scheme = self.config["SCHEMES"].get("projects_scheme").split(", ")
-        elif type == "task":
-            type = "tasks"
-            scheme = self.config["SCHEMES"].get("tasks_scheme").split(", ")
-        with sqlite3.connect(self.database_file) as db:
-            cursor = db.cursor()
-            sql_insert = "INSERT INTO {} ({}) VALUES('{}');".format(
-                type,
-                ", ".join(
-                    [
-                        item
-                        for item in scheme
-                        if item in object_dict and object_dict[item]
-                    ]
-                ),
-                "', '".join(
-                    [
-                        str(object_dict[item])
-                        for item in object_dict
-                        if item in scheme and object_dict[item]
-                    ]
-                ),
-            )
-            logging.debug(sql_insert)
-            cursor.execute(sql_insert)
-            cursor.execute(
-                "SELECT id FROM {} WHERE name = '{}';".format(type, object_dict["name"])
+        table = "projects" if type == "project" else "tasks"
+        row = self.repository.values(table, item)
+        if table == "tasks" and item.project_id is None and item.project is not None:
+            # The insert of the project is queued before this one.
+            row[self.repository.insert_columns[table].index("project_id")] = self.db_id(
+                item.project
             )
-            id = cursor.fetchone()[0]
-
-            return id
+        # The id is the one the insert itself gets, even if another process
+        # adds rows in the meantime; it arrives once the writer got to it.
+        future = self.writer.submit(self.repository.insert, table, row)
+        self.pending_ids[item] = future
+        self.when_written(future, lambda future: self.registered(item, future))
+        return future
+
+    def registered(self, item, future, by_ui_interaction=False):
+        if self.pending_ids.pop(item, None) is None:
+            return
+        error = future.exception()
+        if error is None:
+            if self.model.contains(item):
+                self.model.assign_id(item, future.result())
+                db_log.debug("Registered %s with id %s.", item.name, item.id)
+            return
+        db_log.warning("Could not register %s: %s", item.name, error)
+        self.statusBar().showMessage(
+            "{} konnte nicht angelegt werden: {}".format(item.name, error)
+        )
+        if not self.model.contains(item):
+            return
+        if isinstance(item, model.Project):
+            self.drop_tab(item.name)
+            self.model.remove_project(item)
+        else:
+            self.model.remove_task(item)
+            tab = self.tabs[item.project.name]
+            if tab.tasks_drawn:
+                tab.grid.reload()
+
+    def db_id(self, item):
+        """The id of item, or the Future of its insert while that is queued."""
+        return item.id if item.id is not None else self.pending_ids.get(item)
+
+    @perf.timed("timer.tick")
+    def tick(self, by_ui_interaction=False):
+        if not self.running_tasks:
+            self.ticker.stop()
+            return
+        for task in self.running_tasks.values():
+            self.showTime(task)
+        self.refresh_tab()
+        if time.monotonic() - self.last_beat >= JOURNAL_HEARTBEAT:
+            self.last_beat = time.monotonic()
+            self.journal.beat(self.running_tasks)
+
+    def refresh_tab(self, by_ui_interaction=False):
+        tab = self.ProjektVerzeichnis.currentWidget()
+        if tab is not None and tab.vLayout is not None:
+            self.summarize_time(tab)
+
+    def show_tab(self, index, by_ui_interaction=False):
+        tab = self.ProjektVerzeichnis.widget(index)
+        if tab is None:
+            return
+        self.materialize_tab(tab)
+        self.summarize_time(tab)
 
+    @perf.timed("ui.materialize_tab")
+    def materialize_tab(self, tab, by_ui_interaction=False):
+        if by_ui_interaction:
+            ui_log.debug(
+                "Materializing tab of Project %s because of manual trigger.",
+                tab.project_name,
+            )
+        if tab.vLayout is None:
+            self.build_tab(tab)
+        if not tab.tasks_drawn:
+            ui_log.debug("Drawing tasks of %s", tab.project_name)
+            tab.grid.reload()
+            tab.tasks_drawn = True
+
+        if tab.project_name in self.materialized_tabs:
+            self.materialized_tabs.remove(tab.project_name)
+        self.materialized_tabs.append(tab.project_name)
+        for project_name in self.materialized_tabs[:-MATERIALIZED_TABS]:
+            self.release_tab(project_name)
+            self.materialized_tabs.remove(project_name)
+
+    def release_tab(self, project_name, by_ui_interaction=False):
+        ui_log.debug("Releasing task widgets of Project %s", project_name)
+        tab = self.tabs[project_name]
+        tab.grid.release()
+        tab.tasks_drawn = False
+
+    @perf.timed("timer.showTime")
     def showTime(self, task, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Refreshing timecounter for Task {} of Project {} because of manual trigger.".format(
-                    task.task_name, task.project_name
-                )
+            timer_log.debug(
+                "Refreshing timecounter for Task %s of Project %s because of manual trigger.",
+                task.name,
+                task.project.name,
             )
-        # checking if flag is true
-        if task.flag:
-            task.count += 1
-        text = str(timedelta(seconds=task.count))
-        task.zLabel.setText(text)
-
-    def start_stopwatch(self, task, project_name, by_ui_interaction=False):
+        widget = self.task_widgets.get(task.id)
+        if widget is not None:
+            text = str(timedelta(seconds=int(self.elapsed(task))))
+            widget.zLabel.setText(text)
+
+    def elapsed(self, task):
+        # task.count holds the closed time slots, a running slot is measured
+        # against the monotonic clock so missed ticks never skew the total.
+        if task.running:
+            return task.count + time.monotonic() - task.running_since
+        return task.count
+
+    def start_stopwatch(self, task, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Started timecounter for Task {} of Project {} because of manual trigger.".format(
-                    task.task_name, task.project_name
-                )
+            timer_log.debug(
+                "Started timecounter for Task %s of Project %s because of manual trigger.",
+                task.name,
+                task.project.name,
             )
-        task.flag = True
-        task.active_timer["started_at"] = datetime.now()
-
-    def save_timer(self, task, project_name, by_ui_interaction=False, auto_save=False):
+        if task.running:
+            return
+        if task.id is None:
+            self.statusBar().showMessage("{} wird noch angelegt.".format(task.name))
+            return
+        if task.project.ended_at is not None:
+            self.statusBar().showMessage("{} ist archiviert.".format(task.project.name))
+            return
+        task.running_since = time.monotonic()
+        task.timer_started_at = datetime.now()
+        self.journal.start(task.id, task.timer_started_at)
+        self.running_tasks[task.id] = task
+        if not self.ticker.isActive():
+            self.ticker.start(TICK_INTERVAL)
+        self.changes.start_timer(task, task.timer_started_at)
+        self.submit_changes()
+
+    def resume_stopwatch(self, task, started_at, by_ui_interaction=False):
+        """Let task's timer run from started_at, as persisted in running_timers."""
+        elapsed = max(0.0, (datetime.now() - started_at).total_seconds())
+        task.running_since = time.monotonic() - elapsed
+        task.timer_started_at = started_at
+        self.journal.start(task.id, started_at)
+        self.running_tasks[task.id] = task
+        if not self.ticker.isActive():
+            self.ticker.start(TICK_INTERVAL)
+        self.showTime(task)
+
+    def save_timer(self, task, by_ui_interaction=False, auto_save=False):
         if by_ui_interaction:
-            logging.debug(
-                "Saved count of timer for task  {} of Project {} because of manual trigger.".format(
-                    task.task_name, task.project_name
-                )
+            timer_log.debug(
+                "Saved count of timer for task  %s of Project %s because of manual trigger.",
+                task.name,
+                task.project.name,
             )
-        if task.flag:
-            timer = task.active_timer.copy()
-            timer["ended_at"] = datetime.now()
-            delta = timer["ended_at"] - timer["started_at"]
-            timer["count"] = delta.total_seconds()
-
-            task_dict = self.project_dict[project_name]["tasks"][task.task_name]
-            task_dict["time_slots"].append(timer)
-            task.active_timer = {
-                "started_at": None,
-                "ended_at": None,
-                "task_id": task_dict["id"],
-                "count": 0,
-            }
-            if auto_save:
-                task.active_timer["started_at"] = timer["ended_at"]
+        if task.running:
+            now = time.monotonic()
+            started_at = task.timer_started_at
+            ended_at = datetime.now()
+            # Stored by the wall clock, so count always matches the interval;
+            # the monotonic clock stands still while the machine sleeps.
+            count = max(0.0, (ended_at - started_at).total_seconds())
+            self.journal.time_slot(task.id, started_at, ended_at, count)
+            self.changes.add_time_slot(task, started_at, ended_at, count)
+            task.project.count += count
+            task.running_since = now
+            task.timer_started_at = ended_at if auto_save else None
+            return ended_at
         return
 
-    def stop_stopwatch(self, task, project_name, by_ui_interaction=False):
+    def stop_stopwatch(self, task, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Stopped timecounter for Task {} of Project {} because of manual trigger.".format(
-                    task.task_name, task.project_name
-                )
+            timer_log.debug(
+                "Stopped timecounter for Task %s of Project %s because of manual trigger.",
+                task.name,
+                task.project.name,
             )
-        if task.flag:
-            self.save_timer(
-                task, project_name, by_ui_interaction=False, auto_save=False
-            )
-            task.flag = False
+        if task.running:
+            ended_at = self.save_timer(task, by_ui_interaction=False, auto_save=False)
+            self.journal.stop(task.id, ended_at)
+            self.changes.stop_timer(task, ended_at)
+            task.running_since = None
+            task.timer_started_at = None
+            self.running_tasks.pop(task.id, None)
+            self.showTime(task)
+            self.refresh_tab()
+            self.submit_changes()
         return
 
+    @perf.timed("db.delete_task")
     def delete_task(self, task, permanent=True, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Deleted Task {} of Project {} because of manual trigger.".format(
-                    task.task_name, task.project_name
-                )
+            db_log.debug(
+                "Deleted Task %s of Project %s because of manual trigger.",
+                task.name,
+                task.project.name,
             )
-        if task.flag:
-            self.stop_stopwatch(task, task.project_name)
+        if task.running:
+            self.stop_stopwatch(task)
+        if permanent and task.project.ended_at is not None:
+            self.statusBar().showMessage("{} ist archiviert.".format(task.project.name))
+            return
         if permanent:
-            dlg = DeleteDialog(task.task_name)
+            dlg = DeleteDialog(task.name)
             if dlg.exec():
-                logging.debug("Removing Task {} from database!".format(task.task_name))
-                logging.debug(task.parent().vLayout.gLayout.removeWidget(task))
-                task_id = self.project_dict[task.project_name]["tasks"][task.task_name][
-                    "id"
-                ]
-                self.project_dict[task.project_name]["tasks"].pop(task.task_name)
-                with sqlite3.connect(self.database_file) as db:
-                    cursor = db.cursor()
-                    cursor.execute("DELETE FROM tasks WHERE id = {}".format(task_id))
-            else:
-                return
-
-        task.deleteLater()
-
+                db_log.debug("Removing Task %s from database!", task.name)
+                self.model.remove_task(task)
+                self.changes.discard_task(task)
+                self.journal.discard(task.id)
+                self.writer.submit(self.repository.delete, "tasks", self.db_id(task))
+                tab = self.tabs[task.project.name]
+                if tab.tasks_drawn:
+                    tab.grid.reload()
+                self.summarize_time(tab)
+
+    @perf.timed("timer.summarize_time")
     def summarize_time(self, tab, by_ui_interaction=False):
-        project = self.project_dict[tab.project_name]
-        total_count = 0
-        for task in project["tasks"]:
-            if (
-                "task_obj" in project["tasks"][task]
-                and project["tasks"][task]["task_obj"]
-            ):
-                total_count += project["tasks"][task]["task_obj"].count
-        text = str(timedelta(seconds=total_count))
+        total_count = self.model[tab.project_name].count
+        for task in self.running_tasks.values():
+            if task.project.name == tab.project_name:
+                total_count += self.elapsed(task) - task.count
+        text = str(timedelta(seconds=int(total_count)))
         tab.zLabel.setText(text)
 
     def new_project(self, project_name=None, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Creating new Project {} because of manual trigger.".format(
-                    project_name
-                )
+            ui_log.debug(
+                "Creating new Project %s because of manual trigger.", project_name
             )
 
         if not project_name:
@@ -496,168 +1107,91 @@ class Window(QMainWindow, Ui_MainWindow):
             )
             if not ok:
                 return
-            if project_name in self.project_dict:
+            # Archived projects are not loaded but still own their name.
+            if project_name in self.model or (
+                self.session is not None
+                and storage.find_project(self.session.db, project_name)
+            ):
                 self.statusBar().showMessage(
                     "Es existiert bereits ein Projekt unter diesem Namen!"
                 )
                 return
-            project_dict = {
-                "id": None,
-                "name": project_name,
-                "started_at": datetime.now(),
-                "ended_at": None,
-                "tab": None,
-                "tasks": {},
-            }
-            project_dict["id"] = self.register_db_id("project", project_dict.copy())
-            logging.debug(
-                "Project {} received internal ID {}.".format(
-                    project_name, project_dict["id"]
-                )
-            )
-            self.project_dict[project_name] = project_dict
+            project = model.Project(None, project_name, started_at=datetime.now())
+            self.model.add_project(project)
+            if self.register_db_id("project", project) is None:
+                self.model.remove_project(project)
+                return
         else:
             ok = True
 
         if ok:
             tab = QWidget()
-
-            tab_timer = QTimer(tab)
-
             tab.project_name = project_name
-            self.ProjektVerzeichnis.addTab(tab, project_name)
-            vLayout = QVBoxLayout(tab)
-            vLayout.setAlignment(Qt.AlignTop)
+            tab.vLayout = None
+            tab.tasks_drawn = False
+            self.tabs[project_name] = tab
+            if self.model[project_name].ended_at is None:
+                self.ProjektVerzeichnis.addTab(tab, project_name)
+            else:
+                self.ProjektVerzeichnis.addTab(tab, ARCHIVED_TAB.format(project_name))
 
-            tab.zLabel = QLabel(str(timedelta(seconds=0)))
+    def build_tab(self, tab, by_ui_interaction=False):
+        project_name = tab.project_name
+        vLayout = QVBoxLayout(tab)
 
-            vLayout.addWidget(tab.zLabel, 0, Qt.AlignTop)
+        tab.zLabel = QLabel(str(timedelta(seconds=0)))
 
-            add_task_button = QPushButton("Neue Aufgabe hinzufügen")
-            add_task_button.setShortcut("Ctrl+T")
-            add_task_button.clicked.connect(
-                lambda: self.new_task(project_name, by_ui_interaction=True)
-            )
+        vLayout.addWidget(tab.zLabel, 0, Qt.AlignTop)
 
-            vLayout.addWidget(add_task_button, 0, Qt.AlignTop)
-            if self.project_format == "Flex_Grid":
-                gLayout = FlowLayout()
-            elif self.project_format == "Fix_Grid":
-                gLayout = QGridLayout()
-
-            gLayout.setAlignment(Qt.AlignTop)
-            vLayout.addLayout(gLayout)
+        add_task_button = QPushButton("Neue Aufgabe hinzufügen")
+        add_task_button.setShortcut("Ctrl+T")
+        add_task_button.clicked.connect(
+            lambda: self.new_task(project_name, by_ui_interaction=True)
+        )
 
-            tab.setLayout(vLayout)
-            vLayout.gLayout = gLayout
-            tab.vLayout = vLayout
+        add_task_button.setEnabled(self.model[project_name].ended_at is None)
+        tab.add_task_button = add_task_button
 
-            tab_timer.timeout.connect(
-                lambda: self.summarize_time(tab, by_ui_interaction=False)
-            )
-            tab_timer.start(1000)
+        vLayout.addWidget(add_task_button, 0, Qt.AlignTop)
+        tab.grid = TaskGrid(self, project_name)
+        vLayout.addWidget(tab.grid, 1)
 
-            self.project_dict[project_name]["tab"] = tab
+        tab.setLayout(vLayout)
+        tab.vLayout = vLayout
 
     def new_task(self, project_name, task_name=None, by_ui_interaction=False):
         if by_ui_interaction:
-            logging.debug(
-                "Creating NEW Task for Project {} because of manual trigger.".format(
-                    project_name
-                )
+            ui_log.debug(
+                "Creating NEW Task for Project %s because of manual trigger.",
+                project_name,
             )
+        if self.model[project_name].ended_at is not None:
+            self.statusBar().showMessage("{} ist archiviert.".format(project_name))
+            return
         if not task_name:
             task_name, ok = QInputDialog.getText(
                 self, "Name der Aufgabe", "Tätigkeit", QLineEdit.Normal, "Neue Aufgabe"
             )
             if not ok:
                 return
-            if task_name in self.project_dict[project_name]["tasks"]:
+            if task_name in self.model[project_name].tasks:
                 self.statusBar().showMessage(
                     "Es existiert bereits eine Aufgabe unter diesem Namen!"
                 )
                 return
-            logging.debug("New Tasks name: {}".format(task_name))
-            task_dict = {
-                "id": None,
-                "project_id": self.project_dict[project_name]["id"],
-                "name": task_name,
-                "started_at": datetime.now(),
-                "ended_at": None,
-                "time_slots": [],
-                "task_obj": None,
-                "count": 0,
-            }
-            task_dict["id"] = self.register_db_id("task", task_dict.copy())
-            self.project_dict[project_name]["tasks"][task_name] = task_dict
+            ui_log.debug("New Tasks name: %s", task_name)
+            project = self.model[project_name]
+            task = model.Task(None, project.id, task_name, started_at=datetime.now())
+            self.model.add_task(project, task)
+            if self.register_db_id("task", task) is None:
+                self.model.remove_task(task)
+                return
         else:
             ok = True
 
-        if ok:
-            tab = self.project_dict[project_name]["tab"]
-
-            task = QWidget()
-            task.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            task.task_name = task_name
-            task.project_name = project_name
-            task_dict = self.project_dict[project_name]["tasks"][task.task_name]
-            task.active_timer = {
-                "started_at": None,
-                "ended_at": None,
-                "task_id": task_dict["id"],
-                "count": 0,
-            }
-            self.project_dict[project_name]["tasks"][task_name]["task_obj"] = task
-
-            task.flag = False
-            task.count = task_dict["count"]
-
-            task.timer = QTimer(task)
-            verticalLayout = QVBoxLayout(task)
-            horizontalLayout = QHBoxLayout()
-            delete_task_button = QPushButton("Aufgabe löschen")
-            delete_task_button.setStyleSheet("background-color : red;")
-            push_button_start = QPushButton()
-            push_button_stop = QPushButton()
-            nLabel = QLabel(task_name)
-            zLabel = QLabel(str(timedelta(seconds=task.count)))
-
-            task.zLabel = zLabel
-
-            verticalLayout.addWidget(nLabel, 0, Qt.AlignTop)
-            verticalLayout.addWidget(zLabel, 0, Qt.AlignTop)
-
-            push_button_start.setObjectName(u"start_timer")
-            push_button_stop.setObjectName(u"stop_timer")
-            push_button_start.setText("Start Timer")
-            push_button_stop.setText("Stop Timer")
-
-            delete_task_button.clicked.connect(
-                lambda: self.delete_task(task, by_ui_interaction=True)
-            )
-            push_button_start.clicked.connect(
-                lambda: self.start_stopwatch(task, project_name, by_ui_interaction=True)
-            )
-            push_button_stop.clicked.connect(
-                lambda: self.stop_stopwatch(task, project_name, by_ui_interaction=True)
-            )
-
-            horizontalLayout.addWidget(push_button_start, 0, Qt.AlignBottom)
-            horizontalLayout.addWidget(push_button_stop, 0, Qt.AlignBottom)
-
-            verticalLayout.addLayout(horizontalLayout)
-            verticalLayout.addWidget(delete_task_button, 0, Qt.AlignBottom)
-
-            task.layout = verticalLayout
-            task.setStyleSheet("background: rgba(239, 240, 241, 60);")
-
-            task.timer.timeout.connect(
-                lambda: self.showTime(task, by_ui_interaction=False)
-            )
-            task.timer.start(1000)
-
-            tab.vLayout.gLayout.addWidget(task)
-            # tab.vLayout.addWidget(task, 0, Qt.AlignTop)
+        tab = self.tabs[project_name]
+        if ok and tab.tasks_drawn:
+            tab.grid.reload()
 
     def about(self, by_ui_interaction=False):
         QMessageBox.about(
@@ -714,7 +1248,22 @@ class GeneralDialog(QDialog):
 
 
 if __name__ == "__main__":
+    startup = StartupTimer()
+    startup.mark("imports")
+    measure_startup = "--startup-timing" in sys.argv
+    if measure_startup:
+        sys.argv.remove("--startup-timing")
     app = QApplication(sys.argv)
-    win = Window()
+    startup.mark("qt init")
+    win = Window(startup=startup)
     win.show()
+    if measure_startup:
+
+        def first_paint():
+            startup.mark("first paint")
+            startup.report()
+            app.quit()
+
+        # Runs once the event loop has processed the initial paint events.
+        QTimer.singleShot(0, first_paint)
     sys.exit(app.exec())
@@ -0,0 +1,53 @@
+"""Compare two result files written by benchmarks.suite.
+
+Usage:
+    python -m benchmarks.compare baseline.json results.json [--threshold 0.1]
+
+Exits with status 1 if any benchmark got slower by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare(baseline, results, threshold):
+    regressions = []
+    print(
+        "{:<40} {:>10} {:>10} {:>8}".format("benchmark", "before s", "after s", "ratio")
+    )
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            print("{:<40} {:>10} {:>10.4f}".format(name, "-", result["min"]))
+            continue
+        before = baseline["results"][name]["min"]
+        ratio = result["min"] / before if before else float("inf")
+        flag = " !" if ratio > 1 + threshold else ""
+        print(
+            "{:<40} {:>10.4f} {:>10.4f} {:>7.2f}x{}".format(
+                name, before, result["min"], ratio, flag
+            )
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("baseline")
+    parser.add_argument("results")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.results) as file:
+        results = json.load(file)
+    if baseline["size"] != results["size"]:
+        print("Warning: the results were measured on different database sizes")
+    regressions = compare(baseline, results, args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the original FlowLayout.doLayout against the cached layout pass.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.flowlayout
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QPoint, QRect
+from PyQt5.QtWidgets import QApplication, QPushButton, QSizePolicy, QWidget
+
+from flowlayout import FlowLayout
+
+WIDTHS = (480, 520, 640, 800, 640, 520)
+PASSES = 20
+
+
+def legacy_do_layout(layout, rect, testOnly):
+    # FlowLayout.doLayout as it was before size hints and results were cached.
+    left, top, right, bottom = layout.getContentsMargins()
+    effectiveRect = rect.adjusted(+left, +top, -right, -bottom)
+    x = effectiveRect.x()
+    y = effectiveRect.y()
+    lineHeight = 0
+
+    for item in layout.itemList:
+        wid = item.widget()
+        spaceX = layout.horizontalSpacing()
+        if spaceX == -1:
+            spaceX = wid.style().layoutSpacing(
+                QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Horizontal
+            )
+        spaceY = layout.verticalSpacing()
+        if spaceY == -1:
+            spaceY = wid.style().layoutSpacing(
+                QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Vertical
+            )
+
+        nextX = x + item.sizeHint().width() + spaceX
+        if nextX - spaceX > effectiveRect.right() and lineHeight > 0:
+            x = effectiveRect.x()
+            y = y + lineHeight + spaceY
+            nextX = x + item.sizeHint().width() + spaceX
+            lineHeight = 0
+
+        if not testOnly:
+            item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
+
+        x = nextX
+        lineHeight = max(lineHeight, item.sizeHint().height())
+
+    return y + lineHeight - rect.y() + bottom
+
+
+def resize_passes(height_for_width, do_layout):
+    start = time.perf_counter()
+    for _ in range(PASSES):
+        for width in WIDTHS:
+            height = height_for_width(width)
+            do_layout(QRect(0, 0, width, height))
+    return time.perf_counter() - start
+
+
+def main():
+    app = QApplication(sys.argv)
+    print(
+        "{:>7} {:>12} {:>12} {:>9}".format("items", "legacy s", "cached s", "speedup")
+    )
+    for count in (100, 1000, 5000):
+        parent = QWidget()
+        layout = FlowLayout(parent)
+        for index in range(count):
+            layout.addWidget(QPushButton("Aufgabe {}".format(index)))
+
+        legacy = resize_passes(
+            lambda width: legacy_do_layout(layout, QRect(0, 0, width, 0), True),
+            lambda rect: legacy_do_layout(layout, rect, False),
+        )
+        layout.invalidate()
+        cached = resize_passes(layout.heightForWidth, layout.setGeometry)
+        print(
+            "{:>7} {:>12.4f} {:>12.4f} {:>8.1f}x".format(
+                count, legacy, cached, legacy / cached
+            )
+        )
+        parent.deleteLater()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Create synthetic time-tracker databases for benchmarking.
+
+Usage:
+    python -m benchmarks.generate out.db --size small
+    python -m benchmarks.generate out.db --projects 50 --tasks 1000 --timestamps 100000
+
+The tables come from the [TABLES] section of time-tracker.config and are
+migrated to the current schema, so the app opens the file as it is.
+"""
+
+import argparse
+import configparser
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import storage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (projects, tasks, timestamps)
+SIZES = {
+    "tiny": (2, 10, 1000),
+    "small": (20, 1000, 100000),
+    "medium": (200, 10000, 1000000),
+    "large": (1000, 100000, 10000000),
+}
+DAYS = 365
+BATCH_SIZE = 100000
+
+
+def read_config():
+    config = configparser.ConfigParser()
+    with open(os.path.join(ROOT, "time-tracker.config"), "r") as conf:
+        config.read_file(conf)
+    return config
+
+
+def iter_time_slots(tasks, timestamps, seed, first_day):
+    # Slots fall between 8 and 18 o'clock, so none of them crosses midnight.
+    rng = random.Random(seed)
+    for _ in range(timestamps):
+        started_at = first_day + timedelta(
+            days=rng.randrange(DAYS), seconds=rng.randrange(8 * 3600, 18 * 3600)
+        )
+        count = rng.randrange(60, 3600)
+        yield (
+            rng.randrange(1, tasks + 1),
+            str(started_at),
+            str(started_at + timedelta(seconds=count)),
+            count,
+        )
+
+
+def generate(file, config, projects, tasks, timestamps, seed=0):
+    """Write a database with the given number of rows to file."""
+    if os.path.exists(file):
+        os.remove(file)
+    first_day = datetime.combine(
+        datetime.now().date() - timedelta(days=DAYS), datetime.min.time()
+    )
+    db = sqlite3.connect(file)
+    db.execute("PRAGMA journal_mode = OFF;")
+    db.execute("PRAGMA synchronous = OFF;")
+    storage.create_tables(db, config)
+    storage.migrate(db)
+    with db:
+        db.executemany(
+            "INSERT INTO projects (id, name, started_at) VALUES (?, ?, ?);",
+            (
+                (pid, "Projekt {}".format(pid), str(first_day))
+                for pid in range(1, projects + 1)
+            ),
+        )
+        db.executemany(
+            "INSERT INTO tasks (id, project_id, name, started_at, count) "
+            "VALUES (?, ?, ?, ?, 0);",
+            (
+                (
+                    tid,
+                    (tid - 1) % projects + 1,
+                    "Aufgabe {}".format(tid),
+                    str(first_day),
+                )
+                for tid in range(1, tasks + 1)
+            ),
+        )
+    slots = iter_time_slots(tasks, timestamps, seed, first_day)
+    for _ in range(0, timestamps, BATCH_SIZE):
+        with db:
+            db.executemany(
+                "INSERT INTO timestamps (task_id, started_at, ended_at, count) "
+                "VALUES (?, ?, ?, ?);",
+                (slot for _, slot in zip(range(BATCH_SIZE), slots)),
+            )
+    with db:
+        # Equivalent to storage.fill_rollup as no slot spans two days.
+        db.execute(
+            "INSERT INTO task_days (task_id, day, count) SELECT task_id, "
+            "date(started_at), SUM(count) FROM timestamps GROUP BY 1, 2;"
+        )
+        db.execute(
+            "UPDATE tasks SET count = (SELECT COALESCE(SUM(count), 0) "
+            "FROM task_days WHERE task_days.task_id = tasks.id);"
+        )
+    db.execute("ANALYZE;")
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate")
+    parser.add_argument("file")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--projects", type=int)
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--timestamps", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    projects, tasks, timestamps = SIZES[args.size]
+    projects = args.projects or projects
+    tasks = args.tasks or tasks
+    timestamps = args.timestamps if args.timestamps is not None else timestamps
+
+    start = time.perf_counter()
+    generate(args.file, read_config(), projects, tasks, timestamps, args.seed)
+    print(
+        "Wrote {} projects, {} tasks and {} timestamps to {} in {:.1f} s".format(
+            projects, tasks, timestamps, args.file, time.perf_counter() - start
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare the per-project loader against storage.load_state.
+
+Usage:
+    python -m benchmarks.load_state
+"""
+import configparser
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import storage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TASKS_PER_PROJECT = 20
+SLOTS_PER_TASK = 5
+
+
+def read_config():
+    config = configparser.ConfigParser()
+    with open(os.path.join(ROOT, "time-tracker.config"), "r") as conf:
+        config.read_file(conf)
+    return config
+
+
+def create_database(file, config, projects):
+    db = sqlite3.connect(file)
+    for table in config["TABLES"]:
+        db.execute(config["TABLES"][table])
+    now = datetime.now()
+    db.executemany(
+        "INSERT INTO projects (id, name, started_at) VALUES (?, ?, ?);",
+        ((pid, "Projekt {}".format(pid), now) for pid in range(1, projects + 1)),
+    )
+    db.executemany(
+        "INSERT INTO tasks (id, project_id, name, started_at, count) VALUES (?, ?, ?, ?, 0);",
+        (
+            (tid, (tid - 1) // TASKS_PER_PROJECT + 1, "Aufgabe {}".format(tid), now)
+            for tid in range(1, projects * TASKS_PER_PROJECT + 1)
+        ),
+    )
+    db.executemany(
+        "INSERT INTO timestamps (task_id, started_at, ended_at, count) VALUES (?, ?, ?, 60);",
+        (
+            (tid, now, now + timedelta(seconds=60))
+            for tid in range(1, projects * TASKS_PER_PROJECT + 1)
+            for _ in range(SLOTS_PER_TASK)
+        ),
+    )
+    db.commit()
+    # load_state reads the totals from the task_days rollup.
+    storage.migrate(db)
+    db.close()
+
+
+def load_per_project(db, config):
+    # The loader used before storage.load_state: one query per project and task.
+    projects_scheme = storage.scheme(config, "projects")
+    tasks_scheme = storage.scheme(config, "tasks")
+    project_dict = {}
+    conn = db.cursor()
+    conn.execute("SELECT {} FROM projects;".format(", ".join(projects_scheme)))
+    for project in conn.fetchall():
+        project_dict[project[1]] = {"id": project[0], "tasks": {}}
+    for project in project_dict:
+        conn.execute(
+            "SELECT {} FROM tasks WHERE project_id = {};".format(
+                ", ".join(tasks_scheme), project_dict[project]["id"]
+            )
+        )
+        for task in conn.fetchall():
+            conn.execute(
+                "SELECT SUM(count) FROM timestamps WHERE task_id = {};".format(task[0])
+            )
+            project_dict[project]["tasks"][task[2]] = {"count": conn.fetchone()[0] or 0}
+    return project_dict
+
+
+def measure(loader, file, config, repeat=3):
+    best = None
+    for _ in range(repeat):
+        with sqlite3.connect(file) as db:
+            start = time.perf_counter()
+            loader(db, config)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    config = read_config()
+    print(
+        "{:>9} {:>9} {:>14} {:>14} {:>16}".format(
+            "projects", "tasks", "per-project s", "batched s", "batched us/task"
+        )
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for projects in (10, 50, 100, 200):
+            file = os.path.join(tmp, "bench_{}.db".format(projects))
+            create_database(file, config, projects)
+            tasks = projects * TASKS_PER_PROJECT
+            with sqlite3.connect(file) as db:
+                loaded = len(storage.load_state(db, config).tasks_by_id)
+            if loaded != tasks:
+                raise SystemExit(
+                    "load_state found {} of {} tasks".format(loaded, tasks)
+                )
+            old = measure(load_per_project, file, config, repeat=1)
+            new = measure(storage.load_state, file, config)
+            print(
+                "{:>9} {:>9} {:>14.4f} {:>14.4f} {:>16.2f}".format(
+                    projects, tasks, old, new, new / tasks * 1e6
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
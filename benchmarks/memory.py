@@ -0,0 +1,112 @@
+"""Compare the memory of the nested dicts the window used to keep with model.
+
+Usage:
+    python -m benchmarks.memory
+    python -m benchmarks.memory --tasks 10000 100000 --slots 10
+
+Both structures are built for the same projects and tasks, each task with
+the given number of closed time slots, and measured with tracemalloc.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from model import Model, Project, Task
+
+TASKS_PER_PROJECT = 100
+
+
+def build_dicts(tasks, slots, now):
+    # The keys the baseline window stored, nothing more.
+    project_dict = {}
+    for task_id in range(1, tasks + 1):
+        project_id = (task_id - 1) // TASKS_PER_PROJECT + 1
+        project_name = "Projekt {}".format(project_id)
+        project = project_dict.get(project_name)
+        if project is None:
+            project = project_dict[project_name] = {
+                "id": project_id,
+                "name": project_name,
+                "started_at": now,
+                "ended_at": None,
+                "tasks": {},
+                "tab": None,
+            }
+        task = {
+            "id": task_id,
+            "project_id": project_id,
+            "name": "Aufgabe {}".format(task_id),
+            "started_at": now,
+            "ended_at": None,
+            "time_slots": [],
+            "task_obj": None,
+            "count": 0,
+        }
+        for slot in range(slots):
+            started_at = now + timedelta(minutes=slot)
+            task["time_slots"].append(
+                {
+                    "started_at": started_at,
+                    "ended_at": started_at + timedelta(seconds=60),
+                    "task_id": task_id,
+                    "count": 60.0,
+                }
+            )
+            task["count"] += 60.0
+        project["tasks"][task["name"]] = task
+    return project_dict
+
+
+def build_model(tasks, slots, now):
+    state = Model()
+    for task_id in range(1, tasks + 1):
+        project_id = (task_id - 1) // TASKS_PER_PROJECT + 1
+        project = state.projects_by_id.get(project_id)
+        if project is None:
+            project = Project(project_id, "Projekt {}".format(project_id), now)
+            state.add_project(project)
+        task = Task(task_id, project_id, "Aufgabe {}".format(task_id), now)
+        for slot in range(slots):
+            started_at = now + timedelta(minutes=slot)
+            task.add_time_slot(started_at, started_at + timedelta(seconds=60), 60.0)
+        state.add_task(project, task)
+    return state
+
+
+def measure(build, tasks, slots):
+    now = datetime.now()
+    gc.collect()
+    tracemalloc.start()
+    state = build(tasks, slots, now)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del state
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--slots", type=int, nargs="+", default=[0, 10])
+    args = parser.parse_args()
+
+    print(
+        "{:>9} {:>7} {:>12} {:>12} {:>8}".format(
+            "tasks", "slots", "dicts MiB", "model MiB", "ratio"
+        )
+    )
+    for tasks in args.tasks:
+        for slots in args.slots:
+            old = measure(build_dicts, tasks, slots)
+            new = measure(build_model, tasks, slots)
+            print(
+                "{:>9} {:>7} {:>12.1f} {:>12.1f} {:>8.2f}".format(
+                    tasks, slots, old / 2**20, new / 2**20, old / new
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
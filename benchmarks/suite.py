@@ -0,0 +1,251 @@
+"""Run the hot paths of the app against a synthetic database offscreen.
+
+Usage:
+    python -m benchmarks.suite --size small --output results.json
+    python -m benchmarks.compare baseline.json results.json
+
+Each benchmark is repeated and reported with its minimum, median and mean
+time in seconds. The JSON file records the commit it was measured on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QRect, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QPushButton, QWidget
+
+import model
+import snapshot
+import storage
+from app import Window
+from benchmarks.generate import ROOT, SIZES, generate, read_config
+from flowlayout import FlowLayout
+
+WRITE_TASKS = 100
+REGISTER_TASKS = 100
+LAYOUT_ITEMS = 1000
+LAYOUT_WIDTHS = (480, 520, 640, 800)
+# From a one-letter prefix matching every task down to a selective one.
+SEARCH_TEXTS = ("A", "Aufg", "Aufgabe 12", "Projekt 1")
+
+
+def measure(run, repeat, setup=None):
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return summarize(runs)
+
+
+def summarize(runs):
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "runs": runs,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_config(tmp, database_file):
+    config = read_config()
+    config["state"]["file"] = database_file
+    config["state"]["LOG_TO"] = os.devnull
+    config_file = os.path.join(tmp, "time-tracker.config")
+    with open(config_file, "w") as conf:
+        config.write(conf)
+    return config_file
+
+
+def bench_window(win, repeat):
+    results = {}
+
+    def reset():
+        win.clean_canvas()
+
+    results["populate_from_db (cold)"] = measure(win.populate_from_db, repeat, reset)
+    results["populate_from_db (reload)"] = measure(win.populate_from_db, repeat)
+
+    def load():
+        win.clean_canvas()
+        win.model = storage.load_state(win.session.db, win.config)
+
+    results["draw_state"] = measure(win.draw_state, repeat, load)
+    win.clean_canvas()
+    win.populate_from_db()
+
+    tasks = list(win.model.tasks_by_id.values())[:WRITE_TASKS]
+
+    def start_timers():
+        for task in tasks:
+            win.start_stopwatch(task)
+
+    def write():
+        win.write_state()
+        win.writer.flush()
+
+    results["write_state ({} running tasks)".format(len(tasks))] = measure(
+        write, repeat, start_timers
+    )
+    for task in tasks:
+        win.stop_stopwatch(task)
+    win.write_state()
+
+    project = next(iter(win.model.projects.values()))
+    counter = iter(range(sys.maxsize))
+
+    def queue():
+        for _ in range(REGISTER_TASKS):
+            win.register_db_id(
+                "task",
+                model.Task(
+                    None,
+                    project.id,
+                    "Benchmark {}".format(next(counter)),
+                    started_at=datetime.now(),
+                ),
+            )
+
+    def register():
+        queue()
+        win.writer.flush()
+
+    # Including the inserts, as measured before registering became queued.
+    results["register_db_id (x{})".format(REGISTER_TASKS)] = measure(register, repeat)
+    # Only what the GUI thread spends.
+    results["register_db_id queued (x{})".format(REGISTER_TASKS)] = measure(
+        queue, repeat, win.writer.flush
+    )
+    win.writer.flush()
+    return results
+
+
+def bench_search(db, repeat):
+    return {
+        "search ({!r})".format(text): measure(lambda: storage.search(db, text), repeat)
+        for text in SEARCH_TEXTS
+    }
+
+
+def bench_snapshot(win, repeat):
+    win.write_state()
+    win.writer.flush()
+    return {
+        "snapshot.save": measure(
+            lambda: snapshot.save(win.database_file, win.model), repeat
+        ),
+        "snapshot.load": measure(lambda: snapshot.load(win.database_file), repeat),
+    }
+
+
+def bench_flowlayout(repeat):
+    parent = QWidget()
+    layout = FlowLayout(parent)
+    for index in range(LAYOUT_ITEMS):
+        layout.addWidget(QPushButton("Aufgabe {}".format(index)))
+
+    def resize():
+        for width in LAYOUT_WIDTHS:
+            layout.doLayout(QRect(0, 0, width, 0), False)
+
+    results = {
+        "FlowLayout.doLayout (cold, {} items)".format(LAYOUT_ITEMS): measure(
+            resize, repeat, layout.invalidate
+        ),
+        "FlowLayout.doLayout (warm, {} items)".format(LAYOUT_ITEMS): measure(
+            resize, repeat
+        ),
+    }
+    parent.deleteLater()
+    return results
+
+
+def run_suite(size, repeat, keep=None):
+    projects, tasks, timestamps = SIZES[size]
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_file = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        generate(database_file, read_config(), projects, tasks, timestamps)
+        generated = time.perf_counter() - start
+        if keep:
+            shutil.copyfile(database_file, keep)
+
+        start = time.perf_counter()
+        win = Window(config_file=write_config(tmp, database_file))
+        win.show()
+        app.processEvents()
+        startup = time.perf_counter() - start
+
+        results = {"Window startup": summarize([startup])}
+        results.update(bench_window(win, repeat))
+        results.update(bench_search(win.session.db, repeat))
+        results.update(bench_snapshot(win, repeat))
+        results.update(bench_flowlayout(repeat))
+        win.close_session()
+        win.auto_save.stop()
+        win.deleteLater()
+        app.processEvents()
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "size": {
+            "name": size,
+            "projects": projects,
+            "tasks": tasks,
+            "timestamps": timestamps,
+        },
+        "generate_seconds": generated,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--keep-db", help="copy the generated database here")
+    args = parser.parse_args()
+
+    report = run_suite(args.size, args.repeat, args.keep_db)
+    for name, result in report["results"].items():
+        print("{:<40} {:>10.4f} s".format(name, result["min"]))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
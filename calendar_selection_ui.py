@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'UI/calendar_selection.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.4
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtWidgets
+
+
+class Ui_Dateselection(object):
+    def setupUi(self, Dateselection):
+        Dateselection.setObjectName("Dateselection")
+        Dateselection.resize(400, 300)
+        self.verticalLayoutWidget = QtWidgets.QWidget(Dateselection)
+        self.verticalLayoutWidget.setGeometry(QtCore.QRect(-1, -1, 401, 301))
+        self.verticalLayoutWidget.setObjectName("verticalLayoutWidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.verticalLayoutWidget)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.calendarWidget = QtWidgets.QCalendarWidget(self.verticalLayoutWidget)
+        self.calendarWidget.setObjectName("calendarWidget")
+        self.verticalLayout.addWidget(self.calendarWidget)
+        self.buttonBox = QtWidgets.QDialogButtonBox(self.verticalLayoutWidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.buttonBox.sizePolicy().hasHeightForWidth())
+        self.buttonBox.setSizePolicy(sizePolicy)
+        self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
+        self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+        self.buttonBox.setCenterButtons(True)
+        self.buttonBox.setObjectName("buttonBox")
+        self.verticalLayout.addWidget(self.buttonBox)
+
+        self.retranslateUi(Dateselection)
+        QtCore.QMetaObject.connectSlotsByName(Dateselection)
+
+    def retranslateUi(self, Dateselection):
+        _translate = QtCore.QCoreApplication.translate
+        Dateselection.setWindowTitle(_translate("Dateselection", "Dialog"))
+
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    Dateselection = QtWidgets.QDialog()
+    ui = Ui_Dateselection()
+    ui.setupUi(Dateselection)
+    Dateselection.show()
+    sys.exit(app.exec_())
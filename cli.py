@@ -0,0 +1,182 @@
+"""Command line access to a time-tracker database without starting Qt.
+
+    python cli.py projects
+    python cli.py tasks [PROJECT]
+    python cli.py totals [--from DAY] [--to DAY] [--project PROJECT]
+    python cli.py start PROJECT TASK
+    python cli.py stop PROJECT TASK
+    python cli.py status
+    python cli.py rebuild-rollup
+
+The database defaults to the file stored in time-tracker.config by the app.
+"""
+
+import argparse
+import configparser
+import sys
+from datetime import date, datetime, timedelta
+from os import path
+
+import repository
+import resources
+import storage
+
+CONFIG_FILE = resources.resource_path("time-tracker.config")
+
+
+def format_seconds(seconds):
+    return str(timedelta(seconds=int(seconds)))
+
+
+def read_config(config_file=CONFIG_FILE):
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    return config
+
+
+def database_from_config(config):
+    if config.has_section("state") and "file" in config["state"]:
+        return config["state"]["file"]
+    return None
+
+
+def open_database(database_file):
+    session = storage.Session(database_file)
+    storage.migrate(session.db)
+    return session
+
+
+def list_projects(db, args):
+    for (name,) in db.execute("SELECT name FROM projects ORDER BY name;"):
+        print(name)
+    return 0
+
+
+def list_tasks(db, args):
+    sql = (
+        "SELECT projects.name, tasks.name FROM tasks "
+        "JOIN projects ON projects.id = tasks.project_id"
+    )
+    parameters = []
+    if args.project is not None:
+        sql += " WHERE projects.name = ?"
+        parameters.append(args.project)
+    for project, task in db.execute(sql + " ORDER BY 1, 2;", parameters):
+        print("{}\t{}".format(project, task))
+    return 0
+
+
+def show_totals(db, args):
+    project_id = None
+    if args.project is not None:
+        row = db.execute(
+            "SELECT id FROM projects WHERE name = ?;", (args.project,)
+        ).fetchone()
+        if row is None:
+            print("Unknown project {}".format(args.project), file=sys.stderr)
+            return 1
+        project_id = row[0]
+    last_day = args.last_day or date.today()
+    first_day = args.first_day or last_day
+    totals = {}
+    for project, task, day, seconds in storage.load_day_totals(
+        db, first_day, last_day, project_id
+    ):
+        totals[project, task] = totals.get((project, task), 0) + seconds
+    for (project, task), seconds in sorted(totals.items()):
+        print("{}\t{}\t{}".format(project, task, format_seconds(seconds)))
+    print("Total\t\t{}".format(format_seconds(sum(totals.values()))))
+    return 0
+
+
+def lookup_task(db, args):
+    task_id = storage.find_task(db, args.project, args.task)
+    if task_id is None:
+        print("Unknown task {} in {}".format(args.task, args.project), file=sys.stderr)
+    return task_id
+
+
+def start(db, args):
+    task_id = lookup_task(db, args)
+    if task_id is None:
+        return 1
+    if not storage.start_timer(db, args.repository, task_id, datetime.now()):
+        print("{} is already running".format(args.task), file=sys.stderr)
+        return 1
+    return 0
+
+
+def stop(db, args):
+    task_id = lookup_task(db, args)
+    if task_id is None:
+        return 1
+    seconds = storage.stop_timer(db, args.repository, task_id, datetime.now())
+    if seconds is None:
+        print("{} is not running".format(args.task), file=sys.stderr)
+        return 1
+    print(format_seconds(seconds))
+    return 0
+
+
+def status(db, args):
+    now = datetime.now()
+    running = storage.load_running_timers(db)
+    for _, project, task, started_at in running:
+        elapsed = (now - storage.as_datetime(started_at)).total_seconds()
+        print("{}\t{}\t{}".format(project, task, format_seconds(elapsed)))
+    return 0 if running else 1
+
+
+def rebuild_rollup(db, args):
+    print(storage.rebuild_rollup(db, args.file))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="time-tracker")
+    parser.add_argument(
+        "--file", help="database file, defaults to the one last opened in the app"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("projects").set_defaults(run=list_projects)
+
+    tasks = commands.add_parser("tasks")
+    tasks.add_argument("project", nargs="?")
+    tasks.set_defaults(run=list_tasks)
+
+    totals = commands.add_parser("totals")
+    totals.add_argument("--from", dest="first_day", type=date.fromisoformat)
+    totals.add_argument("--to", dest="last_day", type=date.fromisoformat)
+    totals.add_argument("--project")
+    totals.set_defaults(run=show_totals)
+
+    for name, run in (("start", start), ("stop", stop)):
+        command = commands.add_parser(name)
+        command.add_argument("project")
+        command.add_argument("task")
+        command.set_defaults(run=run)
+
+    commands.add_parser("status").set_defaults(run=status)
+    commands.add_parser("rebuild-rollup").set_defaults(run=rebuild_rollup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = read_config()
+    database_file = args.file or database_from_config(config)
+    if database_file is None or not path.exists(database_file):
+        print("No database file found, pass one with --file", file=sys.stderr)
+        return 2
+    args.file = database_file
+    args.repository = repository.Repository(config)
+    session = open_database(database_file)
+    try:
+        return args.run(session.db, args)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import csv
+import json
+import logging
+import os
+from datetime import date, timedelta
+
+import storage
+
+log = logging.getLogger("time_tracker.db")
+
+COLUMNS = ("project", "task", "started_at", "ended_at", "count")
+FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 5000
+
+
+def build_query(project_id=None, first_day=None, last_day=None):
+    where = []
+    parameters = []
+    if project_id is not None:
+        where.append("tasks.project_id = ?")
+        parameters.append(project_id)
+    if first_day is not None:
+        where.append("timestamps.started_at >= ?")
+        parameters.append(str(first_day))
+    if last_day is not None:
+        where.append("timestamps.started_at < ?")
+        parameters.append(str(date.fromisoformat(str(last_day)) + timedelta(days=1)))
+    where = " WHERE " + " AND ".join(where) if where else ""
+    joins = (
+        " FROM timestamps JOIN tasks ON tasks.id = timestamps.task_id"
+        " JOIN projects ON projects.id = tasks.project_id"
+    )
+    rows = (
+        "SELECT projects.name, tasks.name, timestamps.started_at, "
+        "timestamps.ended_at, timestamps.count"
+        + joins
+        + where
+        + " ORDER BY timestamps.started_at;"
+    )
+    count = "SELECT COUNT(*)" + joins + where + ";"
+    return rows, count, parameters
+
+
+def iter_chunks(db, project_id=None, first_day=None, last_day=None, size=CHUNK_SIZE):
+    """Yield the matching timestamps in lists of at most size rows."""
+    rows, _, parameters = build_query(project_id, first_day, last_day)
+    cursor = db.execute(rows, parameters)
+    while True:
+        chunk = cursor.fetchmany(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def count_rows(db, project_id=None, first_day=None, last_day=None):
+    _, count, parameters = build_query(project_id, first_day, last_day)
+    return db.execute(count, parameters).fetchone()[0]
+
+
+def export(
+    database_file,
+    file,
+    format="csv",
+    project_id=None,
+    first_day=None,
+    last_day=None,
+    progress=None,
+    cancelled=None,
+):
+    """Stream timestamps into file as CSV or JSON Lines.
+
+    Opens its own read-only connection so it can run on any thread. progress
+    is called with (rows written, total rows) after every chunk; when
+    cancelled returns True the partial file is removed. Returns the number of
+    rows written, or None if the export was cancelled.
+    """
+    if format not in FORMATS:
+        raise ValueError("Unknown export format {}".format(format))
+    db = storage.connect_read_only(database_file)
+    written = 0
+    try:
+        total = count_rows(db, project_id, first_day, last_day)
+        with open(file, "w", newline="", encoding="utf-8") as out:
+            if format == "csv":
+                writer = csv.writer(out)
+                writer.writerow(COLUMNS)
+            for chunk in iter_chunks(db, project_id, first_day, last_day):
+                if cancelled is not None and cancelled():
+                    break
+                if format == "csv":
+                    writer.writerows(chunk)
+                else:
+                    out.writelines(
+                        json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n"
+                        for row in chunk
+                    )
+                written += len(chunk)
+                if progress is not None:
+                    progress(written, total)
+            else:
+                log.debug("Exported %s rows to %s", written, file)
+                return written
+    finally:
+        db.close()
+    log.debug("Export to %s cancelled after %s rows", file, written)
+    os.remove(file)
+    return None
@@ -0,0 +1,98 @@
+from PyQt5.QtCore import QDate, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QDateEdit,
+    QDialog,
+    QDialogButtonBox,
+    QFormLayout,
+    QVBoxLayout,
+)
+
+import export
+
+
+class ExportDialog(QDialog):
+    def __init__(self, projects):
+        super().__init__()
+
+        self.setWindowTitle("Export")
+
+        self.project = QComboBox()
+        self.project.addItem("Alle Projekte", None)
+        for project in projects.values():
+            self.project.addItem(project.name, project.id)
+
+        self.format = QComboBox()
+        self.format.addItem("CSV", "csv")
+        self.format.addItem("JSON Lines", "jsonl")
+
+        self.use_range = QCheckBox("Nur Zeitraum exportieren")
+        self.first_day = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.last_day = QDateEdit(QDate.currentDate())
+        for edit in (self.first_day, self.last_day):
+            edit.setCalendarPopup(True)
+            edit.setEnabled(False)
+            self.use_range.toggled.connect(edit.setEnabled)
+
+        form = QFormLayout()
+        form.addRow("Projekt", self.project)
+        form.addRow("Format", self.format)
+        form.addRow(self.use_range)
+        form.addRow("Von", self.first_day)
+        form.addRow("Bis", self.last_day)
+
+        QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        self.layout = QVBoxLayout()
+        self.layout.addLayout(form)
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
+
+    def options(self):
+        options = {
+            "format": self.format.currentData(),
+            "project_id": self.project.currentData(),
+            "first_day": None,
+            "last_day": None,
+        }
+        if self.use_range.isChecked():
+            options["first_day"] = self.first_day.date().toPyDate()
+            options["last_day"] = self.last_day.date().toPyDate()
+        return options
+
+
+class ExportWorker(QThread):
+    """Runs export.export off the GUI thread with its own connection."""
+
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, database_file, file, options, parent=None):
+        super().__init__(parent)
+        self.database_file = database_file
+        self.file = file
+        self.options = options
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            written = export.export(
+                self.database_file,
+                self.file,
+                progress=lambda written, total: self.progress.emit(written, total),
+                cancelled=lambda: self.cancel_requested,
+                **self.options
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(written)
@@ -1,11 +1,17 @@
 import typing
 
-from PyQt5.QtCore import Qt, QPoint, QRect, QSize
+from PyQt5.QtCore import Qt, QRect, QSize
 from PyQt5.QtWidgets import QWidget, QLayout, QLayoutItem, QStyle, QSizePolicy
 
 
 class FlowLayout(QLayout):
     def __init__(self, parent: QWidget=None, margin: int=-1, hSpacing: int=-1, vSpacing: int=-1):
+        # Size hints and spacings per item, and the laid out geometries per
+        # width, are cached until the layout is invalidated.
+        self.itemCache = None
+        self.layoutCache = dict()
+        self.appliedRect = None
+
         super().__init__(parent)
 
         self.itemList = list()
@@ -23,6 +29,13 @@ class FlowLayout(QLayout):
 
     def addItem(self, item: QLayoutItem):
         self.itemList.append(item)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self.itemCache = None
+        self.layoutCache.clear()
+        self.appliedRect = None
+        super().invalidate()
 
     def horizontalSpacing(self) -> int:
         if self.m_hSpace >= 0:
@@ -47,7 +60,9 @@ class FlowLayout(QLayout):
 
     def takeAt(self, index: int) -> typing.Union[QLayoutItem, None]:
         if 0 <= index < len(self.itemList):
-            return self.itemList.pop(index)
+            item = self.itemList.pop(index)
+            self.invalidate()
+            return item
         else:
             return None
 
@@ -63,7 +78,9 @@ class FlowLayout(QLayout):
 
     def setGeometry(self, rect: QRect) -> None:
         super().setGeometry(rect)
-        self.doLayout(rect, False)
+        if rect != self.appliedRect:
+            self.doLayout(rect, False)
+            self.appliedRect = QRect(rect)
 
     def sizeHint(self) -> QSize:
         return self.minimumSize()
@@ -86,34 +103,58 @@ class FlowLayout(QLayout):
         else:
             return parent.spacing()
 
-    def doLayout(self, rect: QRect, testOnly: bool) -> int:
-        left, top, right, bottom = self.getContentsMargins()
-        effectiveRect = rect.adjusted(+left, +top, -right, -bottom)
-        x = effectiveRect.x()
-        y = effectiveRect.y()
+    def itemMetrics(self) -> list:
+        if self.itemCache is None:
+            hSpace = self.horizontalSpacing()
+            vSpace = self.verticalSpacing()
+            self.itemCache = list()
+            for item in self.itemList:
+                wid = item.widget()
+                spaceX = hSpace
+                if spaceX == -1:
+                    spaceX = wid.style().layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Horizontal)
+                spaceY = vSpace
+                if spaceY == -1:
+                    spaceY = wid.style().layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Vertical)
+                hint = item.sizeHint()
+                self.itemCache.append((hint.width(), hint.height(), spaceX, spaceY))
+        return self.itemCache
+
+    def layoutFor(self, width: int) -> tuple:
+        # Geometries are relative to the top left corner of the effective rect.
+        cached = self.layoutCache.get(width)
+        if cached is not None:
+            return cached
+        x = 0
+        y = 0
         lineHeight = 0
-
-        for item in self.itemList:
-            wid = item.widget()
-            spaceX = self.horizontalSpacing()
-            if spaceX == -1:
-                spaceX = wid.style().layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Horizontal)
-            spaceY = self.verticalSpacing()
-            if spaceY == -1:
-                spaceY = wid.style().layoutSpacing(QSizePolicy.PushButton, QSizePolicy.PushButton, Qt.Vertical)
-
-            nextX = x + item.sizeHint().width() + spaceX
-            if nextX - spaceX > effectiveRect.right() and lineHeight > 0:
-                x = effectiveRect.x()
+        geometries = list()
+        for itemWidth, itemHeight, spaceX, spaceY in self.itemMetrics():
+            nextX = x + itemWidth + spaceX
+            if nextX - spaceX > width - 1 and lineHeight > 0:
+                x = 0
                 y = y + lineHeight + spaceY
-                nextX = x + item.sizeHint().width() + spaceX
+                nextX = x + itemWidth + spaceX
                 lineHeight = 0
 
-            if not testOnly:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
-    
+            geometries.append((x, y, itemWidth, itemHeight))
             x = nextX
-            lineHeight = max(lineHeight, item.sizeHint().height())
+            lineHeight = max(lineHeight, itemHeight)
+
+        if len(self.layoutCache) >= 8:
+            self.layoutCache.clear()
+        self.layoutCache[width] = (y + lineHeight, geometries)
+        return self.layoutCache[width]
+
+    def doLayout(self, rect: QRect, testOnly: bool) -> int:
+        left, top, right, bottom = self.getContentsMargins()
+        effectiveRect = rect.adjusted(+left, +top, -right, -bottom)
+        height, geometries = self.layoutFor(effectiveRect.width())
 
-        return y + lineHeight - rect.y() + bottom
+        if not testOnly:
+            offsetX = effectiveRect.x()
+            offsetY = effectiveRect.y()
+            for item, (x, y, width, itemHeight) in zip(self.itemList, geometries):
+                item.setGeometry(QRect(x + offsetX, y + offsetY, width, itemHeight))
 
+        return top + height + bottom
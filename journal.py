@@ -0,0 +1,239 @@
+"""Append-only journal of timer events, so a crash loses seconds, not minutes.
+
+Every start, stop and closed time slot is appended to a JSON Lines file next
+to the database, together with a heartbeat of the running timers. A journal
+thread writes whatever has queued up since its last fsync in one go (group
+commit), so appending never waits on the disk.
+
+Each event carries a sequence number. write_batch stores the number of the
+last event it covers in journal_state, and only newer events are replayed
+into the database on the next start. After every write the file is
+compacted down to those newer events and the timers still running.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+import storage
+
+log = logging.getLogger("time_tracker.db")
+
+SUFFIX = ".events"
+
+
+def journal_file(database_file):
+    return database_file + SUFFIX
+
+
+def read_events(file):
+    events = []
+    try:
+        with open(file, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash is the last one written.
+                    log.warning("Ignoring damaged journal line in %s", file)
+    except FileNotFoundError:
+        pass
+    return events
+
+
+def fold(events, applied, timers=None):
+    """Return the time slots newer than applied and the timers left open.
+
+    Open timers map the task id to [start of the open slot, last time it was
+    seen running]. With timers, see RunningTimers, the newer events are also
+    applied to running_timers, and a time slot whose timer is gone or has
+    moved on, e.g. because cli.py stop recorded it already, is left out.
+    """
+    time_slots = []
+    running = {}
+    for event in events:
+        kind = event["type"]
+        task_id = event.get("task_id")
+        new = event["seq"] > applied
+        if kind == "start":
+            running[task_id] = [event["at"], event["at"]]
+            if new and timers is not None:
+                timers.start(task_id, event["at"])
+        elif kind == "slot":
+            if new and (
+                timers is None
+                or timers.advance(task_id, event["started_at"], event["ended_at"])
+            ):
+                time_slots.append(
+                    (
+                        task_id,
+                        event["started_at"],
+                        event["ended_at"],
+                        event["count"],
+                    )
+                )
+            if task_id in running:
+                running[task_id] = [event["ended_at"], event["ended_at"]]
+        elif kind == "stop":
+            running.pop(task_id, None)
+            if new and timers is not None:
+                timers.stop(task_id, event["at"])
+        elif kind == "beat":
+            for task_id in event["task_ids"]:
+                if task_id in running:
+                    running[task_id][1] = event["at"]
+        elif kind == "discard":
+            running.pop(task_id, None)
+            time_slots = [slot for slot in time_slots if slot[0] != task_id]
+    return time_slots, running
+
+
+class RunningTimers:
+    """The running_timers rows of db, as fold replays the journal into them."""
+
+    def __init__(self, db, repository):
+        self.db = db
+        self.repository = repository
+
+    def start(self, task_id, at):
+        self.repository.start_timer(self.db, task_id, at)
+
+    def advance(self, task_id, started_at, ended_at):
+        return self.repository.advance_timer(self.db, task_id, started_at, ended_at)
+
+    def stop(self, task_id, at):
+        self.repository.stop_timers(self.db, [(task_id, at)])
+
+
+def replay(db, repository, file):
+    """Write the events missing from db, close open timers and drop the file.
+
+    A timer that was still running is credited up to its last heartbeat and
+    its row in running_timers removed. Time another process has recorded in
+    the meantime is skipped, just like write_batch does. Returns the number
+    of recovered time slots.
+    """
+    events = read_events(file)
+    if not events:
+        return 0
+    applied = storage.journal_seq(db)
+    timers = RunningTimers(db, repository)
+    with db:
+        time_slots, running = fold(events, applied, timers)
+        for task_id, (started_at, last_seen) in running.items():
+            if not timers.advance(task_id, started_at, last_seen):
+                continue
+            timers.stop(task_id, last_seen)
+            count = (
+                storage.as_datetime(last_seen) - storage.as_datetime(started_at)
+            ).total_seconds()
+            if count > 0:
+                time_slots.append((task_id, started_at, last_seen, count))
+        repository.record_time_slots(db, time_slots)
+        storage.set_journal_seq(db, max(event["seq"] for event in events))
+    os.remove(file)
+    log.info("Recovered %s time slots from %s", len(time_slots), file)
+    return len(time_slots)
+
+
+class Journal:
+    """Appends events to file; a background thread syncs them in groups."""
+
+    def __init__(self, file, seq=0):
+        self.file = file
+        self.seq = seq
+        self.pending = []
+        self.lock = threading.Lock()
+        self.file_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.out = open(file, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self.run, name="journal", daemon=True)
+        self.thread.start()
+
+    def append(self, kind, **fields):
+        with self.lock:
+            self.seq += 1
+            event = dict(seq=self.seq, type=kind, **fields)
+            self.pending.append(json.dumps(event, default=str))
+            seq = self.seq
+        self.wakeup.set()
+        return seq
+
+    def start(self, task_id, at):
+        return self.append("start", task_id=task_id, at=at)
+
+    def time_slot(self, task_id, started_at, ended_at, count):
+        return self.append(
+            "slot",
+            task_id=task_id,
+            started_at=started_at,
+            ended_at=ended_at,
+            count=count,
+        )
+
+    def stop(self, task_id, at):
+        return self.append("stop", task_id=task_id, at=at)
+
+    def beat(self, task_ids, at=None):
+        return self.append("beat", task_ids=list(task_ids), at=at or datetime.now())
+
+    def discard(self, task_id):
+        return self.append("discard", task_id=task_id)
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.sync()
+
+    def sync(self):
+        """Write and fsync everything appended so far."""
+        with self.file_lock:
+            with self.lock:
+                lines, self.pending = self.pending, []
+            if not lines or self.out is None:
+                return
+            self.out.write("\n".join(lines) + "\n")
+            self.out.flush()
+            os.fsync(self.out.fileno())
+
+    def compact(self, applied):
+        """Rewrite the file without what the database already contains."""
+        with self.file_lock:
+            if self.out is None:
+                return
+            with self.lock:
+                lines, self.pending = self.pending, []
+            if lines:
+                self.out.write("\n".join(lines) + "\n")
+            self.out.close()
+            events = read_events(self.file)
+            _, running = fold(
+                [event for event in events if event["seq"] <= applied], applied
+            )
+            kept = [
+                json.dumps(
+                    {"seq": applied, "type": "start", "task_id": task_id, "at": at}
+                )
+                for task_id, (at, _) in running.items()
+            ]
+            kept += [json.dumps(event) for event in events if event["seq"] > applied]
+            with open(self.file + ".tmp", "w", encoding="utf-8") as out:
+                out.write("".join(line + "\n" for line in kept))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(self.file + ".tmp", self.file)
+            self.out = open(self.file, "a", encoding="utf-8")
+        log.debug("Compacted %s to %s events", self.file, len(kept))
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join()
+        self.sync()
+        with self.file_lock:
+            self.out.close()
+            self.out = None
@@ -0,0 +1,78 @@
+"""Queue based logging so the GUI thread never waits on the log file.
+
+Records are put on a queue by the calling thread and written by a
+QueueListener thread into a size-rotated file. Every area of the app logs
+to its own logger below time_tracker, whose level can be set in the
+[logging] section of time-tracker.config:
+
+    [logging]
+    level = INFO
+    db = DEBUG
+    ui = INFO
+    timer = WARNING
+    max_bytes = 1048576
+    backup_count = 3
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+ROOT = "time_tracker"
+AREAS = ("db", "ui", "timer")
+FORMAT = "%(asctime)s %(name)s %(levelname)s %(message)s"
+DEFAULTS = {"level": "INFO", "max_bytes": "1048576", "backup_count": "3"}
+
+listener = None
+
+
+def get_logger(area):
+    return logging.getLogger("{}.{}".format(ROOT, area))
+
+
+def setup(config, log_file=None):
+    """Route all records through a queue to log_file, or stderr without one."""
+    global listener
+    shutdown()
+    section = dict(DEFAULTS)
+    if config.has_section("logging"):
+        section.update(config["logging"])
+
+    if log_file:
+        handler = RotatingFileHandler(
+            log_file,
+            maxBytes=int(section["max_bytes"]),
+            backupCount=int(section["backup_count"]),
+            encoding="utf-8",
+            delay=True,
+        )
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(section["level"].upper())
+    for area in AREAS:
+        get_logger(area).setLevel(section.get(area, section["level"]).upper())
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
+def shutdown():
+    """Flush the queue and stop the writer thread."""
+    global listener
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
+
+
+atexit.register(shutdown)
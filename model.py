@@ -0,0 +1,205 @@
+"""In-memory model of the projects and tasks of one database.
+
+The classes use __slots__ and hold no references to widgets; the window
+keeps its own mappings from projects to tabs and from tasks to task widgets.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch(moment):
+    """Microseconds since 1970 of a naive datetime, without time zone lookups."""
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_epoch(value):
+    return EPOCH + value * MICROSECOND
+
+
+class TimeSlots:
+    """Closed time slots of one task as parallel arrays of epoch microseconds."""
+
+    __slots__ = ("started_at", "ended_at", "count")
+
+    def __init__(self):
+        self.started_at = array("q")
+        self.ended_at = array("q")
+        self.count = array("d")
+
+    def __len__(self):
+        return len(self.count)
+
+    def append(self, started_at, ended_at, count):
+        self.started_at.append(to_epoch(started_at))
+        self.ended_at.append(to_epoch(ended_at))
+        self.count.append(count)
+
+    def __iter__(self):
+        return self.since(0)
+
+    def since(self, first):
+        """Yield (started_at, ended_at, count) from the slot at index first on."""
+        for index in range(first, len(self.count)):
+            yield (
+                from_epoch(self.started_at[index]),
+                from_epoch(self.ended_at[index]),
+                self.count[index],
+            )
+
+
+class Project:
+    __slots__ = ("id", "name", "started_at", "ended_at", "count", "tasks")
+
+    def __init__(self, id, name, started_at=None, ended_at=None):
+        self.id = id
+        self.name = name
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.count = 0
+        self.tasks = {}
+
+    def row(self, columns):
+        return [getattr(self, column) for column in columns]
+
+    def __repr__(self):
+        return "Project({!r}, {} tasks)".format(self.name, len(self.tasks))
+
+
+class Task:
+    """A task with its total and, while it runs, the state of its timer.
+
+    running_since is the monotonic clock reading the display of the open slot
+    is measured against, timer_started_at its wall-clock start. The slot is
+    stored with the wall-clock difference, which also covers time the
+    machine was asleep.
+    """
+
+    __slots__ = (
+        "id",
+        "project_id",
+        "name",
+        "started_at",
+        "ended_at",
+        "count",
+        "project",
+        "time_slots",
+        "running_since",
+        "timer_started_at",
+    )
+
+    def __init__(self, id, project_id, name, started_at=None, ended_at=None, count=0):
+        self.id = id
+        self.project_id = project_id
+        self.name = name
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.count = count or 0
+        self.project = None
+        # Created on the first slot, most tasks never get one in a session.
+        self.time_slots = None
+        self.running_since = None
+        self.timer_started_at = None
+
+    @property
+    def running(self):
+        return self.running_since is not None
+
+    def add_time_slot(self, started_at, ended_at, count):
+        if self.time_slots is None:
+            self.time_slots = TimeSlots()
+        self.time_slots.append(started_at, ended_at, count)
+        self.count += count
+
+    def row(self, columns):
+        return [getattr(self, column) for column in columns]
+
+    def __repr__(self):
+        return "Task({!r}, {!r})".format(
+            self.project.name if self.project else None, self.name
+        )
+
+
+class Model:
+    """Projects by name and id, tasks by id and by (project name, task name).
+
+    Iterating and membership tests go over the project names, in the order
+    the projects were added. Items whose insert is still queued have no id
+    yet and are only indexed by id once assign_id gives them one.
+    """
+
+    __slots__ = ("projects", "projects_by_id", "tasks_by_id")
+
+    def __init__(self):
+        self.projects = {}
+        self.projects_by_id = {}
+        self.tasks_by_id = {}
+
+    def __iter__(self):
+        return iter(self.projects)
+
+    def __len__(self):
+        return len(self.projects)
+
+    def __contains__(self, project_name):
+        return project_name in self.projects
+
+    def __getitem__(self, project_name):
+        return self.projects[project_name]
+
+    def add_project(self, project):
+        self.projects[project.name] = project
+        if project.id is not None:
+            self.projects_by_id[project.id] = project
+
+    def remove_project(self, project):
+        del self.projects[project.name]
+        self.projects_by_id.pop(project.id, None)
+        for task in project.tasks.values():
+            self.tasks_by_id.pop(task.id, None)
+
+    def update(self, other):
+        """Add the projects of another model, together with their tasks."""
+        for project in other.projects.values():
+            self.add_project(project)
+            for task in project.tasks.values():
+                self.tasks_by_id[task.id] = task
+
+    def add_task(self, project, task):
+        task.project = project
+        project.tasks[task.name] = task
+        project.count += task.count
+        if task.id is not None:
+            self.tasks_by_id[task.id] = task
+
+    def remove_task(self, task):
+        del task.project.tasks[task.name]
+        task.project.count -= task.count
+        self.tasks_by_id.pop(task.id, None)
+
+    def contains(self, item):
+        """Whether the project or task item itself is part of the model."""
+        if isinstance(item, Project):
+            return self.projects.get(item.name) is item
+        project = item.project
+        return (
+            project is not None
+            and self.projects.get(project.name) is project
+            and project.tasks.get(item.name) is item
+        )
+
+    def assign_id(self, item, id):
+        item.id = id
+        if isinstance(item, Project):
+            self.projects_by_id[id] = item
+            for task in item.tasks.values():
+                task.project_id = id
+        else:
+            self.tasks_by_id[id] = item
+
+    def task(self, project_name, task_name):
+        project = self.projects.get(project_name)
+        return None if project is None else project.tasks.get(task_name)
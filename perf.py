@@ -0,0 +1,124 @@
+"""Spans and rolling histograms for the hot paths of the app.
+
+Recording is off by default. While it is off, span() returns a shared no-op
+context manager and functions wrapped by timed() cost one flag check.
+"""
+
+import json
+import time
+from collections import deque
+from functools import wraps
+
+HISTORY = 1000
+
+enabled = False
+histograms = {}
+
+
+class Histogram:
+    """Keeps the last HISTORY samples of one span plus all-time totals."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=HISTORY)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def record(name, seconds):
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.add(seconds)
+
+
+class Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+def span(name):
+    """Time a with-block under name if recording is enabled."""
+    return Span(name) if enabled else NO_SPAN
+
+
+def timed(name):
+    """Decorator recording every call of the wrapped function under name."""
+
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+def stats():
+    return {name: histograms[name].summary() for name in sorted(histograms)}
+
+
+def reset():
+    histograms.clear()
+
+
+def dump(file):
+    with open(file, "w") as out:
+        json.dump({"enabled": enabled, "spans": stats()}, out, indent=2)
@@ -0,0 +1,88 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+import perf
+
+REFRESH_INTERVAL = 1000
+COLUMNS = ("Bereich", "Aufrufe", "p50 ms", "p95 ms", "max ms", "Summe s")
+
+
+class PerfDialog(QDialog):
+    """Live view of the spans recorded by perf, refreshed while visible."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("Performance-Statistik")
+        self.resize(560, 420)
+
+        self.recording = QCheckBox("Messung aktiv")
+        self.recording.setChecked(perf.enabled)
+        self.recording.toggled.connect(perf.enable)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        reset_button = QPushButton("Zurücksetzen")
+        dump_button = QPushButton("Als JSON speichern")
+        self.buttonBox.addButton(reset_button, QDialogButtonBox.ActionRole)
+        self.buttonBox.addButton(dump_button, QDialogButtonBox.ActionRole)
+        self.buttonBox.rejected.connect(self.close)
+        reset_button.clicked.connect(self.reset)
+        dump_button.clicked.connect(self.dump)
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(self.recording)
+        self.layout.addWidget(self.table)
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
+
+        self.refresher = QTimer(self)
+        self.refresher.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresher.start(REFRESH_INTERVAL)
+
+    def hideEvent(self, event):
+        self.refresher.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        stats = perf.stats()
+        self.table.setRowCount(len(stats))
+        for row, (name, summary) in enumerate(stats.items()):
+            values = (
+                name,
+                str(summary["count"]),
+                "{:.2f}".format(summary["p50"] * 1000),
+                "{:.2f}".format(summary["p95"] * 1000),
+                "{:.2f}".format(summary["max"] * 1000),
+                "{:.3f}".format(summary["total"]),
+            )
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+    def reset(self):
+        perf.reset()
+        self.refresh()
+
+    def dump(self):
+        file, check = QFileDialog.getSaveFileName(
+            self, "Statistik speichern", "", "JSON (*.json)"
+        )
+        if check:
+            perf.dump(file)
@@ -0,0 +1,143 @@
+import logging
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+log = logging.getLogger("time_tracker.db")
+
+# Margin for the rounding of julianday in the slot_stats of the database.
+LOOKBACK_MARGIN = timedelta(seconds=1)
+DAY = np.timedelta64(1, "D")
+# Used with archived when the archive database is attached to the connection.
+ALL_TIMESTAMPS = (
+    "(SELECT task_id, started_at, ended_at, count FROM main.timestamps "
+    "UNION ALL SELECT task_id, started_at, ended_at, count FROM archive.timestamps)"
+)
+
+
+def slot_lookback(db):
+    """Return how long before a day a time slot reaching into it may start.
+
+    That is the longest time slot, which slot_stats keeps track of. It bounds
+    the index range scanned for slots that began before a report.
+    """
+    row = db.execute("SELECT longest FROM main.slot_stats WHERE id = 1;").fetchone()
+    return timedelta(days=row[0] if row else 0) + LOOKBACK_MARGIN
+
+
+def load_intervals(db, first_day, last_day, project_id=None, archived=False):
+    """Fetch the time slots overlapping [first_day, last_day] in one query."""
+    first_day = date.fromisoformat(str(first_day))
+    last_day = date.fromisoformat(str(last_day))
+    sql = (
+        "SELECT projects.name, tasks.name, timestamps.started_at, "
+        "timestamps.ended_at, timestamps.count FROM {} AS timestamps "
+        "JOIN tasks ON tasks.id = timestamps.task_id "
+        "JOIN projects ON projects.id = tasks.project_id "
+        "WHERE timestamps.started_at >= ? AND timestamps.started_at < ? "
+        "AND timestamps.ended_at > ?"
+    )
+    parameters = [
+        str(datetime.combine(first_day, time()) - slot_lookback(db)),
+        str(last_day + timedelta(days=1)),
+        str(first_day),
+    ]
+    if project_id is not None:
+        sql += " AND tasks.project_id = ?"
+        parameters.append(project_id)
+    sql = sql.format(ALL_TIMESTAMPS if archived else "main.timestamps")
+    return db.execute(sql + ";", parameters).fetchall()
+
+
+def aggregate(rows, first_day, last_day):
+    """Sum the tracked seconds of rows per project, task, day and ISO week.
+
+    Every slot is split at midnight and clipped to the range; the booked count
+    is distributed in proportion to the wall-clock time of each piece. All
+    of this happens on whole NumPy arrays rather than per row.
+    """
+    first = np.datetime64(str(first_day), "D")
+    end = np.datetime64(str(last_day), "D") + DAY
+    report = {"projects": [], "tasks": [], "days": [], "weeks": []}
+    if not rows:
+        return report
+
+    projects, tasks, started_at, ended_at, counts = zip(*rows)
+    keys = np.array(
+        ["{}\x1f{}".format(project, task) for project, task in zip(projects, tasks)]
+    )
+    task_keys, task_index = np.unique(keys, return_inverse=True)
+    started_at = np.array(started_at, dtype="datetime64[us]")
+    ended_at = np.array(ended_at, dtype="datetime64[us]")
+    counts = np.array(counts, dtype=float)
+    duration = (ended_at - started_at).astype(float)
+
+    # Zero-length slots keep their whole count on the day they started.
+    instant = duration <= 0
+    ended_at = np.where(instant, started_at, ended_at)
+    start_day = started_at.astype("datetime64[D]")
+    end_day = np.where(instant, start_day, (ended_at - 1).astype("datetime64[D]"))
+    start_day = np.maximum(start_day, first)
+    end_day = np.minimum(end_day, end - DAY)
+    days = (end_day - start_day).astype(int) + 1
+    keep = days > 0
+
+    slot = np.repeat(np.flatnonzero(keep), days[keep])
+    offsets = np.arange(len(slot)) - np.repeat(
+        np.cumsum(days[keep]) - days[keep], days[keep]
+    )
+    piece_day = start_day[slot] + offsets * DAY
+    piece_start = np.maximum(started_at[slot], piece_day.astype("datetime64[us]"))
+    piece_end = np.minimum(ended_at[slot], (piece_day + DAY).astype("datetime64[us]"))
+    share = np.where(
+        instant[slot],
+        1.0,
+        (piece_end - piece_start).astype(float)
+        / np.where(instant, 1.0, duration)[slot],
+    )
+    seconds = counts[slot] * share
+
+    day_count = int((end - first).astype(int))
+    cell = task_index[slot] * day_count + (piece_day - first).astype(int)
+    cells, cell_index = np.unique(cell, return_inverse=True)
+    per_cell = np.bincount(cell_index, weights=seconds, minlength=len(cells))
+
+    per_task = np.bincount(
+        cells // day_count, weights=per_cell, minlength=len(task_keys)
+    )
+    per_day = np.bincount(cells % day_count, weights=per_cell, minlength=day_count)
+    project_names = np.array([key.split("\x1f", 1)[0] for key in task_keys])
+    project_keys, project_index = np.unique(project_names, return_inverse=True)
+    per_project = np.bincount(
+        project_index, weights=per_task, minlength=len(project_keys)
+    )
+
+    calendar = first + np.arange(day_count) * DAY
+    weeks = {}
+    for day, total in zip(calendar.tolist(), per_day.tolist()):
+        week = day.isocalendar()[:2]
+        weeks[week] = weeks.get(week, 0) + total
+
+    report["projects"] = [
+        (name, total)
+        for name, total in zip(project_keys.tolist(), per_project.tolist())
+        if total
+    ]
+    report["tasks"] = [
+        tuple(key.split("\x1f", 1)) + (total,)
+        for key, total in zip(task_keys.tolist(), per_task.tolist())
+        if total
+    ]
+    report["days"] = [
+        (day, total) for day, total in zip(calendar.tolist(), per_day.tolist()) if total
+    ]
+    report["weeks"] = [
+        (year, week, total) for (year, week), total in weeks.items() if total
+    ]
+    log.debug("Aggregated %s time slots into %s task days.", len(rows), len(cells))
+    return report
+
+
+def build_report(db, first_day, last_day, project_id=None, archived=False):
+    rows = load_intervals(db, first_day, last_day, project_id, archived)
+    return aggregate(rows, first_day, last_day)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from PyQt5.QtCore import QDate
+from PyQt5.QtGui import QTextCharFormat
+from PyQt5.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+    QVBoxLayout,
+)
+
+from calendar_selection_ui import Ui_Dateselection
+
+
+class DateRangeDialog(QDialog, Ui_Dateselection):
+    """Calendar dialog where a first click picks the start and a second the end."""
+
+    def __init__(self):
+        super().__init__()
+        self.setupUi(self)
+        self.setWindowTitle("Zeitraum auswählen")
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        today = QDate.currentDate()
+        self.first_day = QDate(today.year(), today.month(), 1)
+        self.last_day = today
+        self.pending = None
+        self.calendarWidget.clicked.connect(self.select)
+        self.highlight()
+
+    def select(self, day):
+        if self.pending is None:
+            self.pending = day
+            self.first_day = self.last_day = day
+        else:
+            self.first_day, self.last_day = sorted((self.pending, day))
+            self.pending = None
+        self.highlight()
+
+    def highlight(self):
+        self.calendarWidget.setDateTextFormat(QDate(), QTextCharFormat())
+        selected = QTextCharFormat()
+        selected.setBackground(self.palette().highlight())
+        selected.setForeground(self.palette().highlightedText())
+        day = self.first_day
+        while day <= self.last_day:
+            self.calendarWidget.setDateTextFormat(day, selected)
+            day = day.addDays(1)
+
+    def selected_range(self):
+        return self.first_day.toPyDate(), self.last_day.toPyDate()
+
+
+class ReportDialog(QDialog):
+    def __init__(self, report, first_day, last_day):
+        super().__init__()
+
+        self.setWindowTitle("Bericht {} bis {}".format(first_day, last_day))
+        self.resize(480, 520)
+
+        tabs = QTabWidget()
+        tabs.addTab(self.table(("Projekt", "Zeit"), report["projects"]), "Projekte")
+        tabs.addTab(
+            self.table(("Projekt", "Aufgabe", "Zeit"), report["tasks"]), "Aufgaben"
+        )
+        tabs.addTab(self.table(("Tag", "Zeit"), report["days"]), "Tage")
+        tabs.addTab(self.table(("Jahr", "KW", "Zeit"), report["weeks"]), "Wochen")
+
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok)
+        self.buttonBox.accepted.connect(self.accept)
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(tabs)
+        self.layout.addWidget(self.buttonBox)
+        self.setLayout(self.layout)
+
+    def table(self, headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values[:-1]):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+            total = str(timedelta(seconds=int(values[-1])))
+            table.setItem(row, len(values) - 1, QTableWidgetItem(total))
+        table.resizeColumnsToContents()
+        return table
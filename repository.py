@@ -0,0 +1,158 @@
+"""Parameterized statements for the tables of the [SCHEMES] config section.
+
+The SQL text is built once per config and values are only ever bound as
+parameters, so every statement stays in the statement cache of the
+connection and names may contain any character. The tables the app keeps
+for itself, running_timers and the task_days rollup, have fixed statements.
+"""
+
+from concurrent.futures import Future
+
+import storage
+
+TABLES = ("projects", "tasks", "timestamps")
+TIME_SLOT_FIELDS = ("task_id", "started_at", "ended_at", "count")
+
+START_TIMER_SQL = (
+    "INSERT OR IGNORE INTO running_timers (task_id, started_at) VALUES (?, ?);"
+)
+TIMER_STARTED_AT_SQL = "SELECT started_at FROM running_timers WHERE task_id = ?;"
+ADVANCE_TIMER_SQL = (
+    "UPDATE running_timers SET started_at = ? WHERE task_id = ? AND started_at = ?;"
+)
+STOP_TIMER_SQL = "DELETE FROM running_timers WHERE task_id = ? AND started_at = ?;"
+UPSERT_ROLLUP_SQL = (
+    "INSERT INTO task_days (task_id, day, count) VALUES (?, ?, ?) "
+    "ON CONFLICT(task_id, day) DO UPDATE SET count = count + excluded.count;"
+)
+
+
+class Repository:
+    """Statements of one config; the methods take the connection to use.
+
+    They run on the writer thread via Writer.submit as well as directly.
+    Values may be the Future of an insert queued before, such as the id of a
+    project created a moment ago; it is done by the time they run. Apart
+    from insert and delete they run inside the caller's transaction, like
+    write_batch.
+    """
+
+    def __init__(self, config):
+        self.columns = {}
+        self.insert_columns = {}
+        self.insert_sql = {}
+        self.upsert_sql = {}
+        self.add_count_sql = {}
+        self.delete_sql = {}
+        for table in TABLES:
+            columns = storage.scheme(config, table)
+            # The id is left to AUTOINCREMENT and read back from lastrowid.
+            insert_columns = [column for column in columns if column != "id"]
+            self.columns[table] = columns
+            self.insert_columns[table] = insert_columns
+            self.insert_sql[table] = "INSERT INTO {} ({}) VALUES ({});".format(
+                table, ", ".join(insert_columns), ", ".join("?" * len(insert_columns))
+            )
+            self.upsert_sql[table] = (
+                "INSERT INTO {} ({}) VALUES ({}) "
+                "ON CONFLICT(id) DO UPDATE SET {};".format(
+                    table,
+                    ", ".join(columns),
+                    ", ".join("?" * len(columns)),
+                    ", ".join(
+                        "{0} = excluded.{0}".format(column) for column in insert_columns
+                    ),
+                )
+            )
+            if "count" in insert_columns:
+                self.add_count_sql[table] = (
+                    "UPDATE {} SET count = COALESCE(count, 0) + ? "
+                    "WHERE id = ?;".format(table)
+                )
+            self.delete_sql[table] = "DELETE FROM {} WHERE id = ?;".format(table)
+
+    def values(self, table, item):
+        """Return the insert row of a model object, copied for the writer."""
+        return item.row(self.insert_columns[table])
+
+    def rows(self, table, items):
+        """Return the full rows of model objects for upsert_many."""
+        return [item.row(self.columns[table]) for item in items]
+
+    def insert(self, db, table, row):
+        """Insert one row and return the id SQLite gave it."""
+        with db:
+            return db.execute(self.insert_sql[table], resolve(row)).lastrowid
+
+    def insert_many(self, db, table, rows):
+        db.executemany(self.insert_sql[table], [resolve(row) for row in rows])
+
+    def upsert_many(self, db, table, rows):
+        db.executemany(self.upsert_sql[table], [resolve(row) for row in rows])
+
+    def add_counts(self, db, table, counts):
+        """Add seconds to the count column of rows, given as id to seconds."""
+        db.executemany(
+            self.add_count_sql[table], [(count, id) for id, count in counts.items()]
+        )
+
+    def delete(self, db, table, id):
+        with db:
+            return db.execute(self.delete_sql[table], resolve([id])).rowcount
+
+    def delete_many(self, db, table, ids):
+        db.executemany(self.delete_sql[table], [resolve([id]) for id in ids])
+
+    def record_time_slots(self, db, time_slots):
+        """Insert (task_id, started_at, ended_at, count) time slots.
+
+        Their seconds are added to the task counts and the task_days rollup.
+        """
+        columns = self.insert_columns["timestamps"]
+        rows = []
+        totals = {}
+        rollup = {}
+        for time_slot in time_slots:
+            task_id, started_at, ended_at, count = time_slot
+            values = dict(zip(TIME_SLOT_FIELDS, time_slot))
+            rows.append([values[column] for column in columns])
+            totals[task_id] = totals.get(task_id, 0) + count
+            storage.add_to_rollup(rollup, task_id, started_at, ended_at, count)
+        self.insert_many(db, "timestamps", rows)
+        self.add_counts(db, "tasks", totals)
+        self.upsert_rollup(db, rollup)
+
+    def upsert_rollup(self, db, rollup):
+        """Add the seconds of a (task_id, day) to seconds dict to task_days."""
+        db.executemany(
+            UPSERT_ROLLUP_SQL,
+            [(task_id, day, count) for (task_id, day), count in rollup.items()],
+        )
+
+    def start_timer(self, db, task_id, started_at):
+        """Persist a timer unless the task has one; True if it was started."""
+        return db.execute(START_TIMER_SQL, (task_id, started_at)).rowcount == 1
+
+    def timer_started_at(self, db, task_id):
+        row = db.execute(TIMER_STARTED_AT_SQL, (task_id,)).fetchone()
+        return None if row is None else storage.as_datetime(row[0])
+
+    def advance_timer(self, db, task_id, started_at, ended_at):
+        """Move a persisted timer from started_at on to ended_at.
+
+        Returns False if it does not start at started_at (anymore), e.g.
+        because cli.py stop has already recorded that time.
+        """
+        cursor = db.execute(ADVANCE_TIMER_SQL, (ended_at, task_id, started_at))
+        return cursor.rowcount == 1
+
+    def stop_timers(self, db, timers):
+        """Delete the persisted timers of (task_id, started_at) pairs.
+
+        A timer that moved on in the meantime is another one and stays.
+        """
+        db.executemany(STOP_TIMER_SQL, timers)
+
+
+def resolve(values):
+    return [value.result() if isinstance(value, Future) else value for value in values]
@@ -0,0 +1,90 @@
+import logging
+import os
+import re
+import sys
+from os import path
+
+log = logging.getLogger("time_tracker.ui")
+
+
+def base_dirs():
+    # py2app sets RESOURCEPATH to Contents/Resources, where DATA_FILES land,
+    # while this module itself ends up inside lib/pythonX.Y.zip.
+    dirs = []
+    if os.environ.get("RESOURCEPATH"):
+        dirs.append(os.environ["RESOURCEPATH"])
+    main = getattr(sys.modules.get("__main__"), "__file__", None)
+    if main:
+        dirs.append(path.dirname(path.abspath(main)))
+    dirs.append(path.dirname(path.abspath(__file__)))
+    return dirs
+
+
+BASE_DIRS = base_dirs()
+CACHE_DIR = path.join(
+    os.environ.get("XDG_CACHE_HOME") or path.join(path.expanduser("~"), ".cache"),
+    "time-tracker",
+)
+STYLESHEETS = ("dark.qss", "BreezeStyleSheets/dark.qss")
+
+COMMENTS = re.compile(r"/\*.*?\*/", re.S)
+WHITESPACE = re.compile(r"\s+")
+
+
+def resource_path(name):
+    """Locate a data file in the app bundle or next to the main script.
+
+    The directory of this module is the last resort, for scripts run from
+    elsewhere such as the benchmarks.
+    """
+    for base in BASE_DIRS:
+        file = path.join(base, name)
+        if path.exists(file):
+            return file
+    return path.join(BASE_DIRS[0], name)
+
+
+def preprocess_stylesheet(text):
+    return WHITESPACE.sub(" ", COMMENTS.sub("", text)).strip()
+
+
+def load_stylesheet(candidates=STYLESHEETS):
+    """Return the first existing stylesheet, preprocessed and cached on disk.
+
+    The cache file is keyed on the modification time and size of the source,
+    so an edited stylesheet is picked up on the next start.
+    """
+    for name in candidates:
+        source = resource_path(name)
+        try:
+            stat = os.stat(source)
+            break
+        except OSError:
+            continue
+    else:
+        log.debug("No stylesheet found in %s", ", ".join(candidates))
+        return ""
+
+    prefix = path.basename(source) + "-"
+    cached = path.join(
+        CACHE_DIR, "{}{}-{}".format(prefix, stat.st_mtime_ns, stat.st_size)
+    )
+    try:
+        with open(cached, encoding="utf-8") as file:
+            return file.read()
+    except OSError:
+        pass
+
+    with open(source, encoding="utf-8") as file:
+        style_sheet = preprocess_stylesheet(file.read())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for entry in os.listdir(CACHE_DIR):
+            if entry.startswith(prefix):
+                os.remove(path.join(CACHE_DIR, entry))
+        with open(cached + ".tmp", "w", encoding="utf-8") as file:
+            file.write(style_sheet)
+        os.replace(cached + ".tmp", cached)
+    except OSError as e:
+        log.warning("%s", e)
+    return style_sheet
@@ -0,0 +1,68 @@
+from PyQt5.QtCore import QEvent, Qt
+from PyQt5.QtWidgets import (
+    QDialog,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+)
+
+import storage
+
+
+class SearchDialog(QDialog):
+    """Search-as-you-type over the project and task names of a database."""
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+
+        self.setWindowTitle("Suchen")
+
+        self.query = QLineEdit()
+        self.query.setPlaceholderText("Projekt oder Aufgabe")
+        self.query.textChanged.connect(self.update_results)
+        self.query.returnPressed.connect(self.accept)
+        self.query.installEventFilter(self)
+
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda item: self.accept())
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(self.query)
+        self.layout.addWidget(self.results)
+        self.setLayout(self.layout)
+        self.resize(420, 360)
+
+    def eventFilter(self, watched, event):
+        # The arrow keys pick a result while the cursor stays in the query.
+        if (
+            watched is self.query
+            and event.type() == QEvent.KeyPress
+            and event.key() in (Qt.Key_Up, Qt.Key_Down)
+        ):
+            row = self.results.currentRow() + (1 if event.key() == Qt.Key_Down else -1)
+            if 0 <= row < self.results.count():
+                self.results.setCurrentRow(row)
+            return True
+        return super().eventFilter(watched, event)
+
+    def update_results(self, text):
+        self.results.clear()
+        for project, task, archived in storage.search(self.db, text):
+            label = project if task is None else "{} / {}".format(project, task)
+            if archived:
+                label += " (archiviert)"
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, (project, task))
+            self.results.addItem(item)
+        self.results.setCurrentRow(0)
+
+    def refresh(self):
+        if self.isVisible():
+            self.update_results(self.query.text())
+
+    def selected(self):
+        """Return (project, task or None) of the chosen result, or None."""
+        item = self.results.currentItem()
+        return None if item is None else item.data(Qt.UserRole)
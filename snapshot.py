@@ -0,0 +1,156 @@
+"""Snapshots of the loaded state, so a recent database opens without loading.
+
+When a database is closed, the open projects and tasks are written as plain
+JSON rows to the cache directory. The snapshot carries the size and
+modification time of the database file and its WAL file, taken once every
+connection is closed. Anything written by another process since then changes
+them, so the snapshot is only used while the file is exactly as it was left.
+"""
+
+import gc
+import hashlib
+import json
+import logging
+import os
+from os import path
+
+import resources
+from model import Model, Project, Task
+
+log = logging.getLogger("time_tracker.db")
+
+VERSION = 1
+SNAPSHOT_DIR = path.join(resources.CACHE_DIR, "snapshots")
+MAX_SNAPSHOTS = 16
+
+
+def snapshot_file(database_file):
+    key = hashlib.sha1(path.abspath(database_file).encode("utf-8")).hexdigest()
+    return path.join(SNAPSHOT_DIR, key + ".json")
+
+
+def signature(database_file):
+    stats = []
+    for file in (database_file, database_file + "-wal"):
+        try:
+            stat = os.stat(file)
+        except OSError:
+            stats.append(None)
+        else:
+            stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def text(value):
+    # Projects and tasks created in this session still hold datetimes.
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def rows(state):
+    """Return the project and task rows of the open projects in state."""
+    projects = []
+    tasks = []
+    for project in state.projects.values():
+        if project.ended_at is not None:
+            continue
+        projects.append(
+            [project.id, project.name, text(project.started_at), text(project.ended_at)]
+        )
+        for task in project.tasks.values():
+            tasks.append(
+                [
+                    task.id,
+                    task.project_id,
+                    task.name,
+                    text(task.started_at),
+                    text(task.ended_at),
+                    task.count,
+                ]
+            )
+    return projects, tasks
+
+
+def same(expected, actual):
+    """Compare two rows() results; totals may differ by rounding."""
+    if expected[0] != actual[0] or len(expected[1]) != len(actual[1]):
+        return False
+    for old, new in zip(expected[1], actual[1]):
+        # load_state truncates totals to whole seconds, the model does not.
+        if old[:-1] != new[:-1] or abs(old[-1] - new[-1]) >= 1:
+            return False
+    return True
+
+
+def build(projects, tasks):
+    state = Model()
+    for row in projects:
+        state.add_project(Project(*row))
+    for row in tasks:
+        project = state.projects_by_id.get(row[1])
+        if project is not None:
+            state.add_task(project, Task(*row))
+    return state
+
+
+def save(database_file, state):
+    """Write the snapshot of state; call it after every connection is closed."""
+    projects, tasks = rows(state)
+    file = snapshot_file(database_file)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        data = json.dumps(
+            {
+                "version": VERSION,
+                "database": path.abspath(database_file),
+                "signature": signature(database_file),
+                "projects": projects,
+                "tasks": tasks,
+            },
+            separators=(",", ":"),
+        )
+        # One write; json.dump streams thousands of small chunks.
+        with open(file + ".tmp", "w", encoding="utf-8") as out:
+            out.write(data)
+        os.replace(file + ".tmp", file)
+        prune()
+    except OSError as e:
+        log.warning("%s", e)
+        return False
+    log.debug("Saved snapshot of %s tasks for %s", len(tasks), database_file)
+    return True
+
+
+def load(database_file):
+    """Return the snapshot of database_file as a model, or None if outdated.
+
+    The cyclic garbage collector is paused meanwhile: none of the objects
+    created here is garbage, yet their sheer number would trigger it again
+    and again, which takes more than half of the time.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        with open(snapshot_file(database_file), encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != VERSION or data.get("signature") != signature(
+            database_file
+        ):
+            log.debug("Snapshot of %s is outdated.", database_file)
+            return None
+        return build(data["projects"], data["tasks"])
+    except (OSError, ValueError):
+        return None
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def prune(keep=MAX_SNAPSHOTS):
+    entries = [
+        path.join(SNAPSHOT_DIR, entry)
+        for entry in os.listdir(SNAPSHOT_DIR)
+        if entry.endswith(".json")
+    ]
+    entries.sort(key=path.getmtime, reverse=True)
+    for entry in entries[keep:]:
+        os.remove(entry)
@@ -0,0 +1,680 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, TimeoutError
+from datetime import datetime, timedelta
+
+import perf
+from model import Model, Project, Task
+
+log = logging.getLogger("time_tracker.db")
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -64000),
+    ("mmap_size", 268435456),
+    ("temp_store", "MEMORY"),
+)
+
+
+class Session:
+    """Long-lived connection to one database file, tuned on open."""
+
+    def __init__(self, database_file, busy_timeout=5.0):
+        self.database_file = database_file
+        self.db = sqlite3.connect(database_file, timeout=busy_timeout)
+        self.db.execute("PRAGMA busy_timeout = {};".format(int(busy_timeout * 1000)))
+        for pragma, value in PRAGMAS:
+            self.db.execute("PRAGMA {} = {};".format(pragma, value))
+        log.debug("Opened database session for %s", database_file)
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            try:
+                self.db.execute("PRAGMA optimize;")
+            except sqlite3.Error as e:
+                log.warning("%s", e)
+            self.db.close()
+            self.db = None
+            log.debug("Closed database session for %s", self.database_file)
+
+
+class Writer:
+    """Background thread owning the write connection of a database file.
+
+    Operations are callables taking the connection as first argument. They
+    run one after another in submission order, so the caller never waits on
+    SQLite; submit returns a Future for the operation's result.
+    """
+
+    def __init__(self, database_file, busy_timeout=5.0):
+        self.database_file = database_file
+        self.busy_timeout = busy_timeout
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(
+            target=self.run, name="storage-writer", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, operation, *args):
+        future = Future()
+        self.queue.put((operation, args, future))
+        return future
+
+    def drained(self):
+        """Return a Future that is done once everything submitted so far is."""
+        return self.submit(lambda db: None)
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far has been written."""
+        try:
+            self.drained().result(timeout)
+        except TimeoutError:
+            log.warning("Writer for %s is still busy", self.database_file)
+            return False
+        return True
+
+    def close(self, timeout=None):
+        """Drain the queue and stop; False if that took longer than timeout."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            log.warning(
+                "Writer for %s did not finish within %s s, %s operations pending",
+                self.database_file,
+                timeout,
+                self.queue.qsize(),
+            )
+            return False
+        return True
+
+    def run(self):
+        session = Session(self.database_file, self.busy_timeout)
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                operation, args, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(operation(session.db, *args))
+                except Exception as e:
+                    log.error("Queued write failed: %s", e)
+                    future.set_exception(e)
+        finally:
+            session.close()
+
+
+def connect_read_only(database_file):
+    """Open a separate read-only connection, e.g. for a worker thread."""
+    from urllib.request import pathname2url
+
+    db = sqlite3.connect(
+        "file:{}?mode=ro".format(pathname2url(database_file)), uri=True, timeout=5.0
+    )
+    db.execute("PRAGMA query_only = ON;")
+    return db
+
+
+def as_datetime(value):
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def split_by_day(started_at, ended_at, count):
+    """Yield (day, seconds) for an interval, splitting count at midnight."""
+    started_at = as_datetime(started_at)
+    ended_at = as_datetime(ended_at)
+    if started_at is None:
+        return
+    if (
+        ended_at is None
+        or ended_at <= started_at
+        or started_at.date() == ended_at.date()
+    ):
+        yield started_at.date(), count
+        return
+    total = (ended_at - started_at).total_seconds()
+    start = started_at
+    while start < ended_at:
+        midnight = datetime.combine(
+            start.date() + timedelta(days=1), datetime.min.time()
+        )
+        end = min(midnight, ended_at)
+        yield start.date(), count * (end - start).total_seconds() / total
+        start = end
+
+
+def add_to_rollup(rollup, task_id, started_at, ended_at, count):
+    for day, seconds in split_by_day(started_at, ended_at, count or 0):
+        key = (task_id, day.isoformat())
+        rollup[key] = rollup.get(key, 0) + seconds
+
+
+def fill_rollup(db, archived=False):
+    """Refill task_days from the time slots; runs inside the caller's transaction.
+
+    With archived the attached archive is read as well and the whole rollup
+    is replaced. Without it only the tasks that still have time slots in the
+    database are, so the totals of archived projects survive.
+    """
+    columns = "task_id, started_at, ended_at, count"
+    source = "SELECT {} FROM main.timestamps".format(columns)
+    if archived:
+        # Slots a crashed archive_project left in both files count once.
+        source += (
+            " UNION ALL SELECT {} FROM archive.timestamps "
+            "WHERE id NOT IN (SELECT id FROM main.timestamps)".format(columns)
+        )
+    rollup = {}
+    for task_id, started_at, ended_at, count in db.execute(source + ";"):
+        add_to_rollup(rollup, task_id, started_at, ended_at, count)
+    if archived:
+        db.execute("DELETE FROM task_days;")
+    else:
+        db.execute(
+            "DELETE FROM task_days WHERE task_id IN "
+            "(SELECT task_id FROM main.timestamps);"
+        )
+    db.executemany(
+        "INSERT INTO task_days (task_id, day, count) VALUES (?, ?, ?);",
+        [(task_id, day, count) for (task_id, day), count in rollup.items()],
+    )
+    return len(rollup)
+
+
+@perf.timed("db.rebuild_rollup")
+def rebuild_rollup(db, database_file=None):
+    """Regenerate task_days from the raw timestamps, archived ones included."""
+    archived = database_file is not None and os.path.exists(archive_file(database_file))
+    db.commit()
+    if archived:
+        attach_archive(db, database_file)
+    with db:
+        rows = fill_rollup(db, archived)
+    log.debug("Rebuilt rollup with %s rows.", rows)
+    return rows
+
+
+SEARCH_LIMIT = 50
+
+
+def search_index(table):
+    """Statements for an FTS5 index over the names of table, kept by triggers.
+
+    Rows must be changed with UPDATE or an upsert, as REPLACE deletes without
+    firing the delete trigger unless recursive_triggers is on.
+    """
+    index = "{}_search".format(table)
+    insert = "INSERT INTO {index} (rowid, name) VALUES (new.id, new.name);"
+    delete = (
+        "INSERT INTO {index} ({index}, rowid, name) "
+        "VALUES ('delete', old.id, old.name);"
+    )
+    statements = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(name, "
+        "content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3');",
+        "CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} "
+        "BEGIN " + insert + " END;",
+        "CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} "
+        "BEGIN " + delete + " END;",
+        "CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF name ON {table} "
+        "WHEN old.name IS NOT new.name BEGIN " + delete + " " + insert + " END;",
+        "INSERT INTO {index} ({index}) VALUES ('rebuild');",
+    )
+    return tuple(statement.format(index=index, table=table) for statement in statements)
+
+
+MIGRATIONS = (
+    (
+        1,
+        (
+            "CREATE INDEX IF NOT EXISTS timestamps_task_started "
+            "ON timestamps(task_id, started_at, count);",
+            "CREATE INDEX IF NOT EXISTS timestamps_started "
+            "ON timestamps(started_at, task_id, ended_at, count);",
+        ),
+    ),
+    (
+        2,
+        (
+            "CREATE TABLE IF NOT EXISTS task_days(task_id INTEGER NOT NULL, "
+            "day date NOT NULL, count REAL NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (task_id, day)) WITHOUT ROWID;",
+            "CREATE INDEX IF NOT EXISTS task_days_day "
+            "ON task_days(day, task_id, count);",
+            fill_rollup,
+        ),
+    ),
+    (
+        3,
+        (
+            "CREATE TABLE IF NOT EXISTS running_timers("
+            "task_id INTEGER PRIMARY KEY, started_at datetime NOT NULL);",
+        ),
+    ),
+    (
+        4,
+        (
+            "CREATE TABLE IF NOT EXISTS journal_state("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL);",
+            "INSERT OR IGNORE INTO journal_state (id, seq) VALUES (1, 0);",
+        ),
+    ),
+    (5, search_index("projects") + search_index("tasks")),
+    (
+        6,
+        (
+            # Rows written before the statements were parameterized hold the
+            # text 'None' instead of NULL, which reads as archived.
+            "UPDATE projects SET ended_at = NULL WHERE ended_at IN ('None', '');",
+            "UPDATE tasks SET ended_at = NULL WHERE ended_at IN ('None', '');",
+        ),
+    ),
+    (
+        7,
+        (
+            # The longest time slot in days, which bounds how far back a slot
+            # reaching into a report's range may have started.
+            "CREATE TABLE IF NOT EXISTS slot_stats("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), longest REAL NOT NULL);",
+            "INSERT OR IGNORE INTO slot_stats (id, longest) SELECT 1, "
+            "COALESCE(MAX(julianday(ended_at) - julianday(started_at)), 0) "
+            "FROM timestamps;",
+            "CREATE TRIGGER IF NOT EXISTS timestamps_longest AFTER INSERT "
+            "ON timestamps BEGIN UPDATE slot_stats SET longest = MAX(longest, "
+            "COALESCE(julianday(new.ended_at) - julianday(new.started_at), 0)) "
+            "WHERE id = 1; END;",
+        ),
+    ),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def create_tables(db, config):
+    """Create the tables from the [TABLES] config section on an empty database."""
+    try:
+        for table in config["TABLES"]:
+            table_statement = config["TABLES"][table]
+            db.execute(table_statement)
+            log.debug("%s", table_statement)
+    except sqlite3.Error as e:
+        log.warning("%s", e)
+        return False
+    finally:
+        db.commit()
+    return True
+
+
+@perf.timed("db.migrate")
+def migrate(db):
+    """Upgrade the schema to SCHEMA_VERSION, tracked in PRAGMA user_version."""
+    version = db.execute("PRAGMA user_version;").fetchone()[0]
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        db.commit()
+        db.execute("BEGIN;")
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(db)
+                else:
+                    db.execute(statement)
+            db.execute("PRAGMA user_version = {};".format(target))
+        except sqlite3.Error:
+            db.rollback()
+            raise
+        db.commit()
+        log.debug("Migrated database schema to version %s", target)
+        version = target
+    return version
+
+
+ARCHIVE_TABLES = (
+    "CREATE TABLE IF NOT EXISTS archive.timestamps(id INTEGER PRIMARY KEY, "
+    "task_id INTEGER NOT NULL, started_at datetime NOT NULL, "
+    "ended_at datetime NOT NULL, count INTEGER);",
+    "CREATE INDEX IF NOT EXISTS archive.timestamps_task_started "
+    "ON timestamps(task_id, started_at, count);",
+    "CREATE INDEX IF NOT EXISTS archive.timestamps_started "
+    "ON timestamps(started_at, task_id, ended_at, count);",
+)
+TIMESTAMP_COLUMNS = "id, task_id, started_at, ended_at, count"
+
+
+def archive_file(database_file):
+    root, extension = os.path.splitext(database_file)
+    return "{}.archive{}".format(root, extension or ".db")
+
+
+def attach_archive(db, database_file):
+    """Attach the archive database of database_file as "archive", creating it."""
+    if any(row[1] == "archive" for row in db.execute("PRAGMA database_list;")):
+        return
+    db.commit()
+    db.execute("ATTACH DATABASE ? AS archive;", (archive_file(database_file),))
+    for statement in ARCHIVE_TABLES:
+        db.execute(statement)
+    db.commit()
+
+
+@perf.timed("db.archive_project")
+def archive_project(db, database_file, project_id, ended_at):
+    """Move the time slots of a project into the archive and mark it ended.
+
+    Task totals stay in task_days, so only the raw slots leave the database.
+    SQLite commits attached WAL databases one by one, hence the copy is
+    committed before the rows are deleted here; after a crash in between
+    archiving again just ignores the ids the archive already holds.
+    Returns the number of archived time slots.
+    """
+    attach_archive(db, database_file)
+    task_ids = "SELECT id FROM main.tasks WHERE project_id = ?"
+    with db:
+        db.execute(
+            "INSERT OR IGNORE INTO archive.timestamps ({columns}) "
+            "SELECT {columns} FROM main.timestamps "
+            "WHERE task_id IN ({task_ids});".format(
+                columns=TIMESTAMP_COLUMNS, task_ids=task_ids
+            ),
+            (project_id,),
+        )
+    with db:
+        moved = db.execute(
+            "DELETE FROM main.timestamps WHERE task_id IN ({});".format(task_ids),
+            (project_id,),
+        ).rowcount
+        db.execute(
+            "UPDATE main.projects SET ended_at = ? WHERE id = ?;",
+            (ended_at, project_id),
+        )
+    log.debug("Archived %s time slots of project %s.", moved, project_id)
+    return moved
+
+
+def scheme(config, table):
+    return config["SCHEMES"].get("{}_scheme".format(table)).split(", ")
+
+
+@perf.timed("db.load_state")
+def load_state(db, config, archived=False):
+    """Build the model from a fixed number of set-based queries.
+
+    Projects are read with one query and all tasks, together with their totals
+    from the task_days rollup, with a second one, independent of how many
+    projects exist. Only open projects are loaded, or with archived only the
+    ones that have ended.
+    """
+    projects_scheme = scheme(config, "projects")
+    tasks_scheme = scheme(config, "tasks")
+    state = Model()
+    cursor = db.cursor()
+    try:
+        log.debug("Loading Projects...")
+        cursor.execute(
+            "SELECT {keys} FROM projects WHERE ended_at IS {state} "
+            "ORDER BY id;".format(
+                keys=", ".join(projects_scheme),
+                state="NOT NULL" if archived else "NULL",
+            )
+        )
+        for row in cursor.fetchall():
+            state.add_project(Project(**dict(zip(projects_scheme, row))))
+        log.debug("Projects loaded.")
+    except Exception as e:
+        log.warning("%s", e)
+        return state
+
+    try:
+        log.debug("Loading tasks...")
+        cursor.execute(
+            "SELECT {keys}, COALESCE(totals.total, 0) FROM tasks "
+            "LEFT JOIN (SELECT task_id, SUM(count) AS total FROM task_days "
+            "GROUP BY task_id) AS totals ON totals.task_id = tasks.id "
+            "JOIN projects ON projects.id = tasks.project_id "
+            "WHERE projects.ended_at IS {state} ORDER BY tasks.id;".format(
+                keys=", ".join("tasks.{}".format(key) for key in tasks_scheme),
+                state="NOT NULL" if archived else "NULL",
+            )
+        )
+        for row in cursor.fetchall():
+            task = Task(**dict(zip(tasks_scheme, row[:-1])))
+            project = state.projects_by_id.get(task.project_id)
+            if project is None:
+                # Orphaned, or its project was archived between both queries.
+                log.debug("Skipping task %s without loaded project", task.name)
+                continue
+            task.count = int(row[-1])
+            state.add_task(project, task)
+        log.debug("All tasks loaded.")
+    except Exception as e:
+        log.warning("%s", e)
+
+    return state
+
+
+def diff_states(old, new):
+    """Return the project names only in new, only in old and in both."""
+    added = [project for project in new if project not in old]
+    removed = [project for project in old if project not in new]
+    kept = [project for project in new if project in old]
+    return added, removed, kept
+
+
+class ChangeTracker:
+    """Collects the time slots and timers not yet written to the database.
+
+    Time slots stay in the TimeSlots arrays of their task; only the index of
+    the first one not yet taken is kept per task. Started and stopped timers
+    are kept by task id with the start they have in running_timers.
+    """
+
+    def __init__(self):
+        self.time_slots = {}
+        self.starts = {}
+        self.stops = {}
+
+    def __bool__(self):
+        return bool(self.time_slots or self.starts or self.stops)
+
+    def add_time_slot(self, task, started_at, ended_at, count):
+        if task not in self.time_slots:
+            self.time_slots[task] = len(task.time_slots or ())
+        task.add_time_slot(started_at, ended_at, count)
+
+    def start_timer(self, task, started_at):
+        self.starts[task.id] = started_at
+
+    def stop_timer(self, task, started_at):
+        self.stops[task.id] = started_at
+
+    def discard_task(self, task):
+        self.time_slots.pop(task, None)
+        self.starts.pop(task.id, None)
+        self.stops.pop(task.id, None)
+
+    def clear(self):
+        self.time_slots = {}
+        self.starts = {}
+        self.stops = {}
+
+    def take(self):
+        """Snapshot the pending changes as plain rows for write_batch and clear.
+
+        The rows are copied on the calling thread, so the tasks they came from
+        may change while the batch waits for the writer. Projects and tasks
+        are written by their own statements when created and archived.
+        """
+        batch = {
+            "time_slots": [
+                (task.id, started_at, ended_at, count)
+                for task, first in self.time_slots.items()
+                for started_at, ended_at, count in task.time_slots.since(first)
+            ],
+            "starts": list(self.starts.items()),
+            "stops": list(self.stops.items()),
+        }
+        self.clear()
+        return batch
+
+
+@perf.timed("db.write_batch")
+def write_batch(db, repository, batch):
+    """Write a batch taken from a ChangeTracker within a single transaction.
+
+    A time slot is only written while the timer of its task still starts
+    where the slot does in running_timers, and moves that start on to the
+    end of the slot. Otherwise another process, e.g. cli.py stop, already
+    recorded the time. Returns the timers another process had started
+    before, as task id to (our start, its start), and the (task id, count)
+    of the dropped time slots.
+    """
+    claimed = {}
+    written = []
+    dropped = []
+    with db:
+        for task_id, started_at in batch["starts"]:
+            if not repository.start_timer(db, task_id, started_at):
+                claimed[task_id] = (
+                    started_at,
+                    repository.timer_started_at(db, task_id),
+                )
+        for time_slot in batch["time_slots"]:
+            task_id, started_at, ended_at, count = time_slot
+            if repository.advance_timer(db, task_id, started_at, ended_at):
+                written.append(time_slot)
+            else:
+                dropped.append((task_id, count))
+        repository.record_time_slots(db, written)
+        repository.stop_timers(db, batch["stops"])
+        if batch.get("journal_seq") is not None:
+            set_journal_seq(db, batch["journal_seq"])
+    log.debug("Wrote %s time slots, dropped %s.", len(written), len(dropped))
+    return {"claimed": claimed, "dropped": dropped}
+
+
+@perf.timed("db.load_day_totals")
+def load_day_totals(db, first_day, last_day, project_id=None):
+    """Return (project, task, day, seconds) rows from the task_days rollup."""
+    sql = (
+        "SELECT projects.name, tasks.name, task_days.day, task_days.count "
+        "FROM task_days JOIN tasks ON tasks.id = task_days.task_id "
+        "JOIN projects ON projects.id = tasks.project_id "
+        "WHERE task_days.day BETWEEN ? AND ?"
+    )
+    parameters = [str(first_day), str(last_day)]
+    if project_id is not None:
+        sql += " AND tasks.project_id = ?"
+        parameters.append(project_id)
+    sql += " ORDER BY task_days.day, projects.name, tasks.name;"
+    return db.execute(sql, parameters).fetchall()
+
+
+def search_query(text):
+    """Turn typed text into an FTS5 query matching every word as a prefix."""
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in text.split())
+
+
+@perf.timed("db.search")
+def search(db, text, limit=SEARCH_LIMIT):
+    """Return (project, task, archived) rows whose names match text.
+
+    task is None for matching projects, which come first. Within both the
+    newest rows win; ranking by relevance would have to score every match
+    and takes a hundred times longer for a short prefix on 100k tasks.
+    """
+    query = search_query(text)
+    if not query:
+        return []
+    try:
+        rows = db.execute(
+            "SELECT projects.name, NULL, projects.ended_at IS NOT NULL "
+            "FROM projects_search JOIN projects ON projects.id = projects_search.rowid "
+            "WHERE projects_search MATCH ? ORDER BY projects_search.rowid DESC "
+            "LIMIT ?;",
+            (query, limit),
+        ).fetchall()
+        rows += db.execute(
+            "SELECT projects.name, tasks.name, projects.ended_at IS NOT NULL "
+            "FROM tasks_search JOIN tasks ON tasks.id = tasks_search.rowid "
+            "JOIN projects ON projects.id = tasks.project_id "
+            "WHERE tasks_search MATCH ? ORDER BY tasks_search.rowid DESC LIMIT ?;",
+            (query, limit - len(rows)),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # Text FTS5 cannot parse, e.g. nothing but punctuation.
+        log.debug("Search for %r failed: %s", text, e)
+        return []
+    return [(project, task, bool(archived)) for project, task, archived in rows]
+
+
+def find_project(db, project_name):
+    row = db.execute(
+        "SELECT id FROM projects WHERE name = ?;", (project_name,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def find_task(db, project_name, task_name):
+    row = db.execute(
+        "SELECT tasks.id FROM tasks JOIN projects ON projects.id = tasks.project_id "
+        "WHERE projects.name = ? AND tasks.name = ?;",
+        (project_name, task_name),
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def start_timer(db, repository, task_id, started_at):
+    """Persist a running timer so another process can stop it later."""
+    with db:
+        return repository.start_timer(db, task_id, started_at)
+
+
+def stop_timer(db, repository, task_id, ended_at):
+    """Close a persisted timer into a time slot and return its seconds."""
+    while True:
+        started_at = repository.timer_started_at(db, task_id)
+        if started_at is None:
+            return None
+        count = max(0.0, (ended_at - started_at).total_seconds())
+        with db:
+            # Fails if the window wrote a time slot since the start was read.
+            if repository.advance_timer(db, task_id, started_at, ended_at):
+                repository.stop_timers(db, [(task_id, ended_at)])
+                repository.record_time_slots(
+                    db, [(task_id, started_at, ended_at, count)]
+                )
+                return count
+
+
+def journal_seq(db):
+    """Return the last journal event already contained in the database."""
+    return db.execute("SELECT seq FROM journal_state WHERE id = 1;").fetchone()[0]
+
+
+def set_journal_seq(db, seq):
+    # Runs inside the caller's transaction.
+    db.execute("UPDATE journal_state SET seq = MAX(seq, ?) WHERE id = 1;", (seq,))
+
+
+def load_running_timers(db):
+    """Return (task_id, project, task, started_at) for every persisted timer."""
+    return db.execute(
+        "SELECT running_timers.task_id, projects.name, tasks.name, "
+        "running_timers.started_at "
+        "FROM running_timers JOIN tasks ON tasks.id = running_timers.task_id "
+        "JOIN projects ON projects.id = tasks.project_id "
+        "ORDER BY running_timers.started_at;"
+    ).fetchall()
@@ -0,0 +1,211 @@
+from datetime import timedelta
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QFrame,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QScrollArea,
+    QSizePolicy,
+    QVBoxLayout,
+    QWidget,
+)
+
+from flowlayout import FlowLayout
+
+SPACING = 6
+BUFFER_ROWS = 2
+MIN_TASK_WIDTH = 180
+STYLE = "background: rgba(239, 240, 241, 60);"
+HIGHLIGHT_STYLE = "background: rgba(61, 174, 233, 120);"
+HIGHLIGHT_MSEC = 1500
+
+
+class TaskWidget(QWidget):
+    """Recyclable view of one task, rebound while the grid scrolls."""
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.task = None
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+
+        verticalLayout = QVBoxLayout(self)
+        horizontalLayout = QHBoxLayout()
+        delete_task_button = QPushButton("Aufgabe löschen")
+        delete_task_button.setStyleSheet("background-color : red;")
+        push_button_start = QPushButton()
+        push_button_stop = QPushButton()
+        self.nLabel = QLabel()
+        self.zLabel = QLabel(str(timedelta(seconds=0)))
+
+        verticalLayout.addWidget(self.nLabel, 0, Qt.AlignTop)
+        verticalLayout.addWidget(self.zLabel, 0, Qt.AlignTop)
+
+        push_button_start.setObjectName("start_timer")
+        push_button_stop.setObjectName("stop_timer")
+        push_button_start.setText("Start Timer")
+        push_button_stop.setText("Stop Timer")
+
+        delete_task_button.clicked.connect(
+            lambda: self.tracker.delete_task(self.task, by_ui_interaction=True)
+        )
+        push_button_start.clicked.connect(
+            lambda: self.tracker.start_stopwatch(self.task, by_ui_interaction=True)
+        )
+        push_button_stop.clicked.connect(
+            lambda: self.tracker.stop_stopwatch(self.task, by_ui_interaction=True)
+        )
+
+        horizontalLayout.addWidget(push_button_start, 0, Qt.AlignBottom)
+        horizontalLayout.addWidget(push_button_stop, 0, Qt.AlignBottom)
+
+        verticalLayout.addLayout(horizontalLayout)
+        verticalLayout.addWidget(delete_task_button, 0, Qt.AlignBottom)
+
+        # Archived tasks are shown read-only.
+        self.edit_buttons = (push_button_start, push_button_stop, delete_task_button)
+
+        self.setStyleSheet(STYLE)
+
+    def highlight(self):
+        self.setStyleSheet(HIGHLIGHT_STYLE)
+        QTimer.singleShot(HIGHLIGHT_MSEC, lambda: self.setStyleSheet(STYLE))
+
+    def bind(self, task):
+        widgets = self.tracker.task_widgets
+        if self.task is not None and widgets.get(self.task.id) is self:
+            del widgets[self.task.id]
+        self.task = task
+        if task is None:
+            return
+        widgets[task.id] = self
+        for button in self.edit_buttons:
+            button.setEnabled(task.project.ended_at is None)
+        self.nLabel.setText(
+            self.nLabel.fontMetrics().elidedText(
+                task.name, Qt.ElideRight, self.width() - SPACING * 2
+            )
+        )
+        self.nLabel.setToolTip(task.name)
+        self.tracker.showTime(task)
+
+
+class TaskGrid(QScrollArea):
+    """Scrollable task grid that only keeps the visible rows as widgets.
+
+    The tasks of a project are laid out in uniform cells. A FlowLayout holds
+    the widgets of the visible rows plus BUFFER_ROWS on either side, while two
+    spacers stand in for the rows above and below. Scrolling rebinds the
+    existing widgets to other tasks instead of creating new ones.
+    """
+
+    def __init__(self, tracker, project_name, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.project_name = project_name
+        self.task_names = []
+        self.widgets = []
+        self.spare = []
+        self.first_index = 0
+
+        self.setWidgetResizable(True)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+        container = QWidget()
+        vLayout = QVBoxLayout(container)
+        vLayout.setContentsMargins(0, 0, 0, 0)
+        vLayout.setSpacing(0)
+        self.top_spacer = QWidget()
+        self.top_spacer.setFixedHeight(0)
+        self.flow_widget = QWidget()
+        self.flow = FlowLayout(self.flow_widget, 0, SPACING, SPACING)
+        self.bottom_spacer = QWidget()
+        self.bottom_spacer.setFixedHeight(0)
+        vLayout.addWidget(self.top_spacer)
+        vLayout.addWidget(self.flow_widget)
+        vLayout.addWidget(self.bottom_spacer)
+        vLayout.addStretch()
+        self.setWidget(container)
+
+        prototype = TaskWidget(tracker)
+        self.cell_size = prototype.sizeHint()
+        self.cell_size.setWidth(max(self.cell_size.width(), MIN_TASK_WIDTH))
+        prototype.deleteLater()
+
+        self.verticalScrollBar().valueChanged.connect(lambda value: self.update_view())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_view()
+
+    def reload(self):
+        self.task_names = list(self.tracker.model[self.project_name].tasks)
+        self.update_view(rebind=True)
+
+    def scroll_to(self, task_name):
+        """Scroll the row of task_name into view and return its widget."""
+        if task_name not in self.task_names:
+            return None
+        index = self.task_names.index(task_name)
+        row = index // self.columns()
+        self.verticalScrollBar().setValue(row * (self.cell_size.height() + SPACING))
+        self.update_view()
+        offset = index - self.first_index
+        return self.widgets[offset] if 0 <= offset < len(self.widgets) else None
+
+    def release(self):
+        for widget in self.widgets + self.spare:
+            widget.bind(None)
+            self.flow.removeWidget(widget)
+            widget.deleteLater()
+        self.widgets = []
+        self.spare = []
+        self.task_names = []
+
+    def columns(self):
+        # Mirrors the wrapping rule of FlowLayout.doLayout for uniform cells.
+        width = self.viewport().width()
+        cell = self.cell_size.width()
+        return max(1, (width - 1 - cell) // (cell + SPACING) + 1)
+
+    def update_view(self, rebind=False):
+        columns = self.columns()
+        row_height = self.cell_size.height() + SPACING
+        rows = -(-len(self.task_names) // columns)
+        top = self.verticalScrollBar().value()
+        first_row = min(rows, max(0, top // row_height - BUFFER_ROWS))
+        last_row = min(
+            rows, (top + self.viewport().height()) // row_height + 1 + BUFFER_ROWS
+        )
+        first_index = first_row * columns
+        needed = max(0, min(len(self.task_names), last_row * columns) - first_index)
+
+        self.top_spacer.setFixedHeight(first_row * row_height)
+        self.bottom_spacer.setFixedHeight((rows - last_row) * row_height)
+
+        if (
+            not rebind
+            and first_index == self.first_index
+            and needed == len(self.widgets)
+        ):
+            return
+        while len(self.widgets) < needed:
+            widget = self.spare.pop() if self.spare else TaskWidget(self.tracker)
+            widget.setFixedSize(self.cell_size)
+            self.flow.addWidget(widget)
+            widget.show()
+            self.widgets.append(widget)
+        while len(self.widgets) > needed:
+            widget = self.widgets.pop()
+            widget.bind(None)
+            self.flow.removeWidget(widget)
+            widget.hide()
+            self.spare.append(widget)
+
+        self.first_index = first_index
+        tasks = self.tracker.model[self.project_name].tasks
+        for offset, widget in enumerate(self.widgets):
+            widget.bind(tasks[self.task_names[first_index + offset]])
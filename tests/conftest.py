@@ -0,0 +1,43 @@
+import configparser
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import repository  # noqa: E402
+import storage  # noqa: E402
+
+
+@pytest.fixture
+def config():
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, "time-tracker.config"))
+    return config
+
+
+@pytest.fixture
+def repo(config):
+    return repository.Repository(config)
+
+
+@pytest.fixture
+def db(config):
+    """A migrated database with one project of two tasks, ids 1 and 2."""
+    db = sqlite3.connect(":memory:")
+    storage.create_tables(db, config)
+    storage.migrate(db)
+    with db:
+        db.execute(
+            "INSERT INTO projects (name, started_at) VALUES ('P', '2026-01-01');"
+        )
+        db.executemany(
+            "INSERT INTO tasks (project_id, name, started_at, count) "
+            "VALUES (1, ?, '2026-01-01', 0);",
+            [("A",), ("B",)],
+        )
+    yield db
+    db.close()
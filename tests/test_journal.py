@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import journal
+import storage
+
+T0 = datetime(2026, 3, 1, 9, 0)
+
+
+def at(seconds):
+    return str(T0 + timedelta(seconds=seconds))
+
+
+def start(seq, task_id, seconds):
+    return {"seq": seq, "type": "start", "task_id": task_id, "at": at(seconds)}
+
+
+def slot(seq, task_id, started, ended):
+    return {
+        "seq": seq,
+        "type": "slot",
+        "task_id": task_id,
+        "started_at": at(started),
+        "ended_at": at(ended),
+        "count": float(ended - started),
+    }
+
+
+def stop(seq, task_id, seconds):
+    return {"seq": seq, "type": "stop", "task_id": task_id, "at": at(seconds)}
+
+
+def beat(seq, task_ids, seconds):
+    return {"seq": seq, "type": "beat", "task_ids": task_ids, "at": at(seconds)}
+
+
+def write_journal(tmp_path, events):
+    file = tmp_path / "db.events"
+    file.write_text("".join(journal.json.dumps(event) + "\n" for event in events))
+    return str(file)
+
+
+def slots(db):
+    return db.execute(
+        "SELECT task_id, started_at, ended_at, count FROM timestamps ORDER BY id;"
+    ).fetchall()
+
+
+def timers(db):
+    return db.execute(
+        "SELECT task_id, started_at FROM running_timers ORDER BY task_id;"
+    ).fetchall()
+
+
+def test_fold_returns_newer_slots_and_open_timers():
+    events = [
+        start(1, 1, 0),
+        slot(2, 1, 0, 60),
+        start(3, 2, 10),
+        slot(4, 1, 60, 120),
+        beat(5, [1, 2], 150),
+        stop(6, 2, 150),
+    ]
+    time_slots, running = journal.fold(events, 2)
+    assert time_slots == [(1, at(60), at(120), 60.0)]
+    assert running == {1: [at(120), at(150)]}
+
+
+def test_fold_drops_discarded_tasks():
+    events = [
+        start(1, 1, 0),
+        slot(2, 1, 0, 60),
+        {"seq": 3, "type": "discard", "task_id": 1},
+    ]
+    assert journal.fold(events, 0) == ([], {})
+
+
+def test_read_events_ignores_cut_line(tmp_path):
+    file = tmp_path / "db.events"
+    file.write_text(journal.json.dumps(start(1, 1, 0)) + '\n{"seq": 2, "ty')
+    assert journal.read_events(str(file)) == [start(1, 1, 0)]
+
+
+def test_replay_writes_pending_slots_and_open_timer(db, repo, tmp_path):
+    with db:
+        repo.start_timer(db, 1, at(0))
+        storage.set_journal_seq(db, 1)
+    file = write_journal(
+        tmp_path, [start(1, 1, 0), slot(2, 1, 0, 60), beat(3, [1], 90)]
+    )
+    assert journal.replay(db, repo, file) == 2
+    assert slots(db) == [(1, at(0), at(60), 60), (1, at(60), at(90), 30)]
+    assert timers(db) == []
+    assert storage.journal_seq(db) == 3
+    assert not journal.os.path.exists(file)
+
+
+def test_replay_skips_time_recorded_by_cli(db, repo, tmp_path):
+    with db:
+        repo.start_timer(db, 1, at(0))
+        storage.set_journal_seq(db, 1)
+    file = write_journal(
+        tmp_path, [start(1, 1, 0), slot(2, 1, 0, 60), beat(3, [1], 90)]
+    )
+    # The window crashed, then cli.py stop recorded the whole timer.
+    storage.stop_timer(db, repo, 1, T0 + timedelta(seconds=100))
+    assert journal.replay(db, repo, file) == 0
+    assert slots(db) == [(1, at(0), at(100), 100)]
+    assert db.execute("SELECT count FROM tasks WHERE id = 1;").fetchone() == (100,)
+
+
+def test_replay_keeps_other_timers(db, repo, tmp_path):
+    with db:
+        repo.start_timer(db, 2, at(5))
+    file = write_journal(tmp_path, [start(1, 1, 0), stop(2, 1, 0)])
+    journal.replay(db, repo, file)
+    assert timers(db) == [(2, at(5))]
+
+
+def test_replay_applies_unwritten_start_and_stop(db, repo, tmp_path):
+    file = write_journal(tmp_path, [start(1, 1, 0), slot(2, 1, 0, 60), stop(3, 1, 60)])
+    assert journal.replay(db, repo, file) == 1
+    assert slots(db) == [(1, at(0), at(60), 60)]
+    assert timers(db) == []
+
+
+def test_compact_keeps_running_timers_and_newer_events(tmp_path):
+    file = str(tmp_path / "db.events")
+    log = journal.Journal(file)
+    log.start(1, at(0))
+    log.time_slot(1, at(0), at(60), 60.0)
+    log.start(2, at(10))
+    log.stop(2, at(20))
+    log.time_slot(1, at(60), at(90), 30.0)
+    log.sync()
+    log.compact(4)
+    log.close()
+    events = journal.read_events(file)
+    assert events == [
+        start(4, 1, 60),
+        slot(5, 1, 60, 90),
+    ]
+    assert journal.fold(events, 4) == (
+        [(1, at(60), at(90), 30.0)],
+        {1: [at(90), at(90)]},
+    )
+
+
+def test_compact_after_close_leaves_file(tmp_path):
+    file = str(tmp_path / "db.events")
+    log = journal.Journal(file)
+    log.start(1, at(0))
+    log.close()
+    log.compact(1)
+    assert journal.read_events(file) == [start(1, 1, 0)]
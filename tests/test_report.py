@@ -0,0 +1,25 @@
+from datetime import date, datetime, timedelta
+
+import report
+import storage
+
+
+def test_report_finds_slot_longer_than_a_week(db, repo):
+    ended_at = datetime(2026, 3, 11, 12, 0)
+    started_at = ended_at - timedelta(days=10)
+    storage.start_timer(db, repo, 1, started_at)
+    storage.stop_timer(db, repo, 1, ended_at)
+
+    result = report.build_report(db, date(2026, 3, 11), date(2026, 3, 11))
+    assert result["tasks"] == [("P", "A", 12 * 3600.0)]
+
+
+def test_slot_lookback_follows_longest_slot(db, repo):
+    assert report.slot_lookback(db) == report.LOOKBACK_MARGIN
+    started_at = datetime(2026, 3, 1, 9, 0)
+    with db:
+        repo.record_time_slots(
+            db, [(1, started_at, started_at + timedelta(hours=30), 30 * 3600.0)]
+        )
+    lookback = report.slot_lookback(db) - report.LOOKBACK_MARGIN
+    assert abs(lookback - timedelta(hours=30)) < timedelta(milliseconds=1)
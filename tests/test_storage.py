@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import model
+import storage
+
+T0 = datetime(2026, 3, 1, 9, 0)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def timer(db, task_id):
+    row = db.execute(
+        "SELECT started_at FROM running_timers WHERE task_id = ?;", (task_id,)
+    ).fetchone()
+    return None if row is None else storage.as_datetime(row[0])
+
+
+def task_count(db, task_id):
+    return db.execute("SELECT count FROM tasks WHERE id = ?;", (task_id,)).fetchone()[0]
+
+
+def slots(db):
+    return db.execute(
+        "SELECT task_id, started_at, ended_at, count FROM timestamps ORDER BY id;"
+    ).fetchall()
+
+
+def batch(time_slots=(), starts=(), stops=(), journal_seq=None):
+    return {
+        "time_slots": list(time_slots),
+        "starts": list(starts),
+        "stops": list(stops),
+        "journal_seq": journal_seq,
+    }
+
+
+def test_split_by_day_at_midnight():
+    pieces = list(
+        storage.split_by_day(datetime(2026, 3, 1, 23), datetime(2026, 3, 2, 1), 7200)
+    )
+    assert pieces == [
+        (datetime(2026, 3, 1).date(), 3600),
+        (datetime(2026, 3, 2).date(), 3600),
+    ]
+
+
+def test_tracker_takes_each_slot_once():
+    task = model.Task(1, 1, "A")
+    other = model.Task(2, 1, "B")
+    changes = storage.ChangeTracker()
+    changes.add_time_slot(task, at(0), at(60), 60.0)
+    assert changes.take()["time_slots"] == [(1, at(0), at(60), 60.0)]
+    assert not changes
+
+    changes.start_timer(other, at(0))
+    changes.add_time_slot(task, at(60), at(90), 30.0)
+    changes.add_time_slot(other, at(0), at(10), 10.0)
+    changes.discard_task(other)
+    taken = changes.take()
+    assert taken["time_slots"] == [(1, at(60), at(90), 30.0)]
+    assert taken["starts"] == []
+    assert len(task.time_slots) == 2 and task.count == 90.0
+
+
+def test_write_batch_starts_and_advances_timer(db, repo):
+    result = storage.write_batch(db, repo, batch(starts=[(1, at(0))]))
+    assert result == {"claimed": {}, "dropped": []}
+    assert timer(db, 1) == at(0)
+
+    storage.write_batch(
+        db, repo, batch(time_slots=[(1, at(0), at(300), 300.0)], journal_seq=4)
+    )
+    assert timer(db, 1) == at(300)
+    assert slots(db) == [(1, str(at(0)), str(at(300)), 300)]
+    assert task_count(db, 1) == 300
+    assert db.execute("SELECT task_id, day, count FROM task_days;").fetchall() == [
+        (1, "2026-03-01", 300.0)
+    ]
+    assert storage.journal_seq(db) == 4
+
+
+def test_write_batch_claims_timer_started_elsewhere(db, repo):
+    with db:
+        repo.start_timer(db, 1, at(-100))
+    result = storage.write_batch(db, repo, batch(starts=[(1, at(0))]))
+    assert result["claimed"] == {1: (at(0), at(-100))}
+    assert timer(db, 1) == at(-100)
+
+
+def test_write_batch_drops_slots_recorded_elsewhere(db, repo):
+    storage.write_batch(db, repo, batch(starts=[(1, at(0))]))
+    assert storage.stop_timer(db, repo, 1, at(200)) == 200.0
+    assert timer(db, 1) is None
+
+    result = storage.write_batch(
+        db,
+        repo,
+        batch(time_slots=[(1, at(0), at(300), 300.0)], stops=[(1, at(300))]),
+    )
+    assert result == {"claimed": {}, "dropped": [(1, 300.0)]}
+    assert slots(db) == [(1, str(at(0)), str(at(200)), 200)]
+    assert task_count(db, 1) == 200
+
+
+def test_write_batch_keeps_count_added_elsewhere(db, repo):
+    storage.write_batch(db, repo, batch(starts=[(1, at(0)), (2, at(0))]))
+    storage.stop_timer(db, repo, 2, at(50))
+    storage.write_batch(db, repo, batch(time_slots=[(1, at(0), at(30), 30.0)]))
+    assert task_count(db, 1) == 30
+    assert task_count(db, 2) == 50
+
+
+def test_write_batch_stop_leaves_newer_timer(db, repo):
+    storage.write_batch(db, repo, batch(starts=[(1, at(0))]))
+    storage.stop_timer(db, repo, 1, at(10))
+    storage.start_timer(db, repo, 1, at(20))
+    storage.write_batch(
+        db,
+        repo,
+        batch(time_slots=[(1, at(0), at(30), 30.0)], stops=[(1, at(30))]),
+    )
+    assert timer(db, 1) == at(20)
+
+
+def test_stop_timer_after_window_advanced(db, repo):
+    storage.write_batch(db, repo, batch(starts=[(1, at(0))]))
+    storage.write_batch(db, repo, batch(time_slots=[(1, at(0), at(60), 60.0)]))
+    assert storage.stop_timer(db, repo, 1, at(100)) == 40.0
+    assert task_count(db, 1) == 100
+    assert storage.stop_timer(db, repo, 1, at(120)) is None